@@ -0,0 +1,361 @@
+#!/usr/bin/env python3
+"""
+Grammar Service benchmark for AdmitAI Korea
+Measures latency percentiles and throughput of the analyzer (in-process) and
+the Flask endpoints (through the test client) on a synthetic essay corpus.
+
+    python3 services/grammarBenchmark.py --output bench.json
+    python3 services/grammarBenchmark.py --output new.json --compare bench.json
+    python3 services/grammarBenchmark.py --shortcuts --output shortcuts.json
+    python3 services/grammarBenchmark.py --check-incremental
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import textwrap
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+# Measure LanguageTool itself: the result cache and the shortcuts that skip or
+# share LanguageTool calls are off unless --cache or --shortcuts is given
+if '--cache' not in sys.argv:
+    os.environ['GRAMMAR_CACHE_SIZE'] = '0'
+    os.environ.pop('GRAMMAR_CACHE_DB', None)
+if '--shortcuts' not in sys.argv:
+    os.environ['GRAMMAR_PREFILTER'] = '0'
+    os.environ['GRAMMAR_MICROBATCH'] = '0'
+    os.environ['GRAMMAR_COALESCE'] = '0'
+
+import grammarService  # noqa: E402
+
+# =============================================================================
+# Synthetic corpus
+# =============================================================================
+
+CORPUS_SEED = 20250801
+
+LENGTHS = {
+    'sentence': 20,
+    'paragraph': 150,
+    'essay': 650,
+    'long': 3000
+}
+
+# Injected errors per 100 words
+ERROR_DENSITIES = {
+    'clean': 0,
+    'low': 1,
+    'high': 5
+}
+
+SENTENCES = [
+    "Growing up in Seoul, I was always fascinated by how technology could bridge cultural gaps.",
+    "My grandmother learned to use a smartphone so she could video call our relatives in America.",
+    "In high school, I led a coding club where we developed apps to help students learn English.",
+    "The project taught me that good design starts with listening to the people who will use it.",
+    "Every Saturday morning, I volunteered at the community center near our apartment.",
+    "I spent the summer studying the history of the Korean alphabet and its creation.",
+    "Working with younger students showed me how much patience real teaching requires.",
+    "When our robot failed at the regional competition, we rebuilt the drive system from scratch.",
+    "My parents always reminded me that effort matters more than the final result.",
+    "At university, I hope to combine computer science with my interest in education."
+]
+
+# (correct, erroneous) substitutions typical of Korean ESL writing
+ERROR_PATTERNS = [
+    (" a smartphone", " smartphone"),
+    (" the community", " community"),
+    ("learned", "learn"),
+    (" was ", " were "),
+    ("always", "allways"),
+    ("history", "histroy"),
+    (" to ", " to to "),
+    ("students", "student"),
+    ("requires", "require"),
+    ("reminded", "remind")
+]
+
+def build_corpus(seed=CORPUS_SEED):
+    """Deterministic essays for every length x error density combination"""
+    rng = random.Random(seed)
+    corpus = []
+    for length_name, target_words in LENGTHS.items():
+        for density_name, per_hundred in ERROR_DENSITIES.items():
+            sentences = []
+            words = 0
+            while words < target_words:
+                sentence = rng.choice(SENTENCES)
+                sentences.append(sentence)
+                words += len(sentence.split())
+            errors = round(words * per_hundred / 100)
+            for _ in range(errors):
+                index = rng.randrange(len(sentences))
+                correct, wrong = rng.choice(ERROR_PATTERNS)
+                if correct in sentences[index]:
+                    sentences[index] = sentences[index].replace(correct, wrong, 1)
+            # Paragraph breaks every five sentences, as in real essays
+            paragraphs = [' '.join(sentences[i:i + 5]) for i in range(0, len(sentences), 5)]
+            corpus.append({
+                'id': f'{length_name}-{density_name}',
+                'length': length_name,
+                'density': density_name,
+                'words': words,
+                'text': '\n\n'.join(paragraphs)
+            })
+    return corpus
+
+# =============================================================================
+# Measurement
+# =============================================================================
+
+def percentile(sorted_values, fraction):
+    """Linearly interpolated percentile of pre-sorted values"""
+    if not sorted_values:
+        return None
+    position = (len(sorted_values) - 1) * fraction
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    weight = position - lower
+    return sorted_values[lower] * (1 - weight) + sorted_values[upper] * weight
+
+def summarize(latencies, errors, elapsed):
+    ordered = sorted(latencies)
+    to_ms = lambda value: round(value * 1000, 3) if value is not None else None
+    return {
+        'requests': len(latencies) + errors,
+        'errors': errors,
+        'p50_ms': to_ms(percentile(ordered, 0.50)),
+        'p95_ms': to_ms(percentile(ordered, 0.95)),
+        'p99_ms': to_ms(percentile(ordered, 0.99)),
+        'mean_ms': to_ms(sum(ordered) / len(ordered)) if ordered else None,
+        'throughput_rps': round(len(latencies) / elapsed, 2) if elapsed else None
+    }
+
+def run_scenario(call, corpus, concurrency, repeat):
+    """Run call(text) for every corpus item `repeat` times at the given concurrency"""
+    jobs = [item for _ in range(repeat) for item in corpus]
+    latencies = []
+    by_length = {}
+    errors = 0
+    lock = threading.Lock()
+
+    def run_one(item):
+        nonlocal errors
+        started = time.perf_counter()
+        try:
+            ok = call(item['text'])
+        except Exception:
+            ok = False
+        latency = time.perf_counter() - started
+        with lock:
+            if ok:
+                latencies.append(latency)
+                by_length.setdefault(item['length'], []).append(latency)
+            else:
+                errors += 1
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(run_one, jobs))
+    elapsed = time.perf_counter() - started
+
+    result = summarize(latencies, errors, elapsed)
+    result['by_length'] = {
+        length: summarize(values, 0, 0) for length, values in sorted(by_length.items())
+    }
+    return result
+
+def analyzer_targets(analyzer):
+    return {
+        'analyze_text': lambda text: 'error' not in analyzer.analyze_text(text),
+        'get_suggestions': lambda text: isinstance(analyzer.get_suggestions(text), list),
+        'quick_check': lambda text: 'score' in analyzer.quick_check(text)
+    }
+
+def endpoint_targets():
+    local = threading.local()
+
+    def post(path):
+        def call(text):
+            client = getattr(local, 'client', None)
+            if client is None:
+                client = local.client = grammarService.app.test_client()
+            return client.post(path, json={'text': text}).status_code == 200
+        return call
+
+    return {
+        'POST /analyze': post('/analyze'),
+        'POST /suggestions': post('/suggestions'),
+        'POST /check': post('/check')
+    }
+
+def wait_until_ready(timeout):
+    grammarService.start_background_init()
+    deadline = time.time() + timeout
+    while not grammarService.is_ready():
+        state = grammarService.readiness_state()
+        if state.get('state') == 'failed' or time.time() > deadline:
+            raise RuntimeError(f"Grammar service not ready: {state}")
+        time.sleep(0.2)
+
+def run_benchmark(concurrency_levels, repeat, kinds):
+    wait_until_ready(timeout=300)
+    analyzer = grammarService.get_analyzer()
+    corpus = build_corpus()
+
+    targets = []
+    if 'analyzer' in kinds:
+        targets += [('analyzer', name, call) for name, call in analyzer_targets(analyzer).items()]
+    if 'endpoints' in kinds:
+        targets += [('endpoint', name, call) for name, call in endpoint_targets().items()]
+
+    results = []
+    for kind, name, call in targets:
+        for concurrency in concurrency_levels:
+            print(f"  {kind:<8} {name:<18} concurrency={concurrency}", file=sys.stderr)
+            result = run_scenario(call, corpus, concurrency, repeat)
+            results.append({'kind': kind, 'target': name, 'concurrency': concurrency, **result})
+
+    return {
+        'meta': {
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'language_tool_python': _package_version('language-tool-python'),
+            'corpus_seed': CORPUS_SEED,
+            'corpus_size': len(corpus),
+            'repeat': repeat,
+            'cache_enabled': grammarService.CACHE_SIZE > 0,
+            'prefilter_enabled': analyzer.prefilter is not None,
+            'microbatch_enabled': analyzer.batcher is not None,
+            'coalescing_enabled': analyzer.inflight.enabled,
+            'pool_size': analyzer.pool.size,
+            'startup': grammarService.readiness_state()
+        },
+        'results': results
+    }
+
+def _package_version(name):
+    try:
+        from importlib.metadata import version
+        return version(name)
+    except Exception:
+        return None
+
+# =============================================================================
+# Incremental equivalence
+# =============================================================================
+
+def _match_key(match):
+    return (match['ruleId'], match['offset'], match['errorLength'], match['message'],
+            tuple(match['replacements']))
+
+def check_incremental_equivalence(analyzer, corpus):
+    """Compare incremental and full checks on multi-paragraph and hard-wrapped texts.
+
+    Returns (text id, only in incremental, only in full) for every mismatch.
+    Text-level rules are excluded, since they only see one paragraph at a time
+    in incremental mode.
+    """
+    mismatches = []
+    for item in corpus:
+        wrapped = '\n\n'.join(
+            textwrap.fill(paragraph, width=72) for paragraph in item['text'].split('\n\n')
+        )
+        for variant, text in (('paragraphs', item['text']), ('wrapped', wrapped)):
+            full, incremental = (
+                {_match_key(match) for match in matches if match['ruleId'] not in grammarService.TEXT_LEVEL_RULES}
+                for matches in (analyzer.check(text), analyzer.check_incremental(text))
+            )
+            if full != incremental:
+                mismatches.append((f"{item['id']}/{variant}", incremental - full, full - incremental))
+    return mismatches
+
+# =============================================================================
+# Comparison
+# =============================================================================
+
+# Settings that change what a run measures; runs should only be compared like for like
+SETTINGS = ('cache_enabled', 'prefilter_enabled', 'microbatch_enabled', 'coalescing_enabled')
+
+def compare(baseline, current, threshold):
+    """Print per-scenario changes; return the scenarios that regressed beyond threshold"""
+    baseline_index = {
+        (row['kind'], row['target'], row['concurrency']): row for row in baseline['results']
+    }
+    for setting in SETTINGS:
+        old, new = baseline['meta'].get(setting), current['meta'].get(setting)
+        if old != new:
+            print(f"Warning: {setting} is {new} but was {old} in the baseline", file=sys.stderr)
+    regressions = []
+    print(f"{'scenario':<46} {'p50':>16} {'p95':>16} {'rps':>16}")
+    for row in current['results']:
+        key = (row['kind'], row['target'], row['concurrency'])
+        before = baseline_index.get(key)
+        if before is None:
+            continue
+        cells = []
+        for metric, higher_is_worse in (('p50_ms', True), ('p95_ms', True), ('throughput_rps', False)):
+            old, new = before.get(metric), row.get(metric)
+            if not old or new is None:
+                cells.append('n/a')
+                continue
+            change = (new - old) / old
+            cells.append(f"{old:.1f}->{new:.1f} ({change:+.0%})")
+            worse = change if higher_is_worse else -change
+            if worse > threshold:
+                regressions.append((key, metric, change))
+        label = f"{row['kind']} {row['target']} c={row['concurrency']}"
+        print(f"{label:<46} {cells[0]:>16} {cells[1]:>16} {cells[2]:>16}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the grammar service')
+    parser.add_argument('--output', help='Write results as JSON to this file')
+    parser.add_argument('--compare', help='Baseline results JSON to compare against')
+    parser.add_argument('--threshold', type=float, default=0.10,
+                        help='Relative slowdown that counts as a regression (default 0.10)')
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 4, 8])
+    parser.add_argument('--repeat', type=int, default=3, help='Passes over the corpus per scenario')
+    parser.add_argument('--targets', nargs='+', choices=['analyzer', 'endpoints'],
+                        default=['analyzer', 'endpoints'])
+    parser.add_argument('--cache', action='store_true', help='Keep the result cache enabled')
+    parser.add_argument('--shortcuts', action='store_true',
+                        help='Keep the pre-filter, micro-batching and coalescing enabled')
+    parser.add_argument('--check-incremental', action='store_true',
+                        help='Only check that incremental and full checks find the same matches')
+    args = parser.parse_args()
+
+    if args.check_incremental:
+        wait_until_ready(timeout=300)
+        mismatches = check_incremental_equivalence(grammarService.get_analyzer(), build_corpus())
+        for text_id, only_incremental, only_full in mismatches:
+            print(f"{text_id}: incremental only {sorted(only_incremental)}, full only {sorted(only_full)}")
+        print(f"{len(mismatches)} mismatching text(s)", file=sys.stderr)
+        sys.exit(1 if mismatches else 0)
+
+    report = run_benchmark(args.concurrency, args.repeat, args.targets)
+
+    if args.output:
+        with open(args.output, 'w') as output:
+            json.dump(report, output, indent=2)
+        print(f"Results written to {args.output}", file=sys.stderr)
+    else:
+        print(json.dumps(report, indent=2))
+
+    if args.compare:
+        with open(args.compare) as baseline_file:
+            baseline = json.load(baseline_file)
+        regressions = compare(baseline, report, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) beyond {args.threshold:.0%}", file=sys.stderr)
+            sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -4,13 +4,50 @@ Grammar Service for AdmitAI Korea
 Uses LanguageTool for free, powerful grammar checking
 """
 
+import bisect
+import gzip
+import hashlib
 import json
+import math
+import os
+import queue
+import random
+import re
+import sqlite3
 import sys
-from flask import Flask, request, jsonify
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from flask import Flask, Response, request, jsonify, stream_with_context
 from flask_cors import CORS
 from language_tool_python import LanguageTool
+from werkzeug.datastructures import MIMEAccept
+from werkzeug.http import parse_accept_header
+from processMemory import child_pids, rss_mb
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram,
+    generate_latest, multiprocess
+)
 import logging
 
+# Faster encoders are optional; the service falls back to the stdlib
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -18,17 +55,983 @@ logger = logging.getLogger(__name__)
 app = Flask(__name__)
 CORS(app)
 
-# Initialize LanguageTool
-try:
-    tool = LanguageTool('en-US')
-    logger.info("LanguageTool initialized successfully")
-except Exception as e:
-    logger.error(f"Failed to initialize LanguageTool: {e}")
-    tool = None
+# Prometheus metrics. Under gunicorn, set PROMETHEUS_MULTIPROC_DIR so /metrics
+# aggregates every worker process.
+LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+TEXT_LENGTH_BUCKETS = ((500, '<500'), (2000, '500-2k'), (5000, '2k-5k'), (20000, '5k-20k'))
+
+REQUESTS = Counter(
+    'grammar_requests_total', 'HTTP requests handled', ['route', 'method', 'status']
+)
+REQUEST_LATENCY = Histogram(
+    'grammar_request_duration_seconds', 'HTTP request latency', ['route'],
+    buckets=LATENCY_BUCKETS
+)
+IN_FLIGHT = Gauge(
+    'grammar_requests_in_flight', 'HTTP requests currently being handled', ['route'],
+    multiprocess_mode='livesum'
+)
+CHECK_LATENCY = Histogram(
+    'grammar_tool_check_duration_seconds', 'Time spent inside LanguageTool check calls',
+    ['length_bucket'], buckets=LATENCY_BUCKETS
+)
+CHECK_MATCHES = Histogram(
+    'grammar_check_matches', 'Matches returned per LanguageTool check', ['length_bucket'],
+    buckets=(0, 1, 2, 5, 10, 20, 50, 100, 250)
+)
+COALESCED_CHECKS = Counter(
+    'grammar_coalesced_checks_total', 'Checks served by waiting on an identical in-flight check'
+)
+ERRORS = Counter(
+    'grammar_errors_total', 'Errors by where they were caught and exception type',
+    ['where', 'exception']
+)
+
+def _length_bucket(text):
+    for limit, label in TEXT_LENGTH_BUCKETS:
+        if len(text) < limit:
+            return label
+    return '20k+'
+
+def _record_error(where, e):
+    ERRORS.labels(where=where, exception=type(e).__name__).inc()
+
+def render_metrics():
+    """Exposition body and content type, aggregated across processes when configured"""
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+# Result cache configuration
+CACHE_SIZE = int(os.environ.get('GRAMMAR_CACHE_SIZE', '1024'))
+CACHE_TTL = float(os.environ.get('GRAMMAR_CACHE_TTL', '3600'))
+CACHE_DB_PATH = os.environ.get('GRAMMAR_CACHE_DB')
+CACHE_DB_MAX_ROWS = int(os.environ.get('GRAMMAR_CACHE_DB_MAX_ROWS', '50000'))
+
+# Re-check only edited paragraphs by default
+INCREMENTAL_DEFAULT = os.environ.get('GRAMMAR_INCREMENTAL', '0') == '1'
+
+# Response encoding: compress bodies above this size when the client accepts it
+COMPRESS_MIN_BYTES = int(os.environ.get('GRAMMAR_COMPRESS_MIN_BYTES', '1024'))
+GZIP_LEVEL = int(os.environ.get('GRAMMAR_GZIP_LEVEL', '5'))
+ZSTD_LEVEL = int(os.environ.get('GRAMMAR_ZSTD_LEVEL', '3'))
+
+# Rule profiles: LanguageTool rule/category settings applied per request.
+# 'quick' runs a handful of cheap, high-precision rules; 'esl-focused' keeps the
+# grammar-type categories that matter most for ESL writers.
+RULE_PROFILES = {
+    'full': {},
+    'quick': {
+        'enabled_rules': {
+            'MORFOLOGIK_RULE_EN_US', 'MORFOLOGIK_RULE_EN_GB', 'EN_A_VS_AN',
+            'ENGLISH_WORD_REPEAT_RULE', 'UPPERCASE_SENTENCE_START', 'DOUBLE_PUNCTUATION',
+            'COMMA_PARENTHESIS_WHITESPACE', 'WHITESPACE_RULE', 'I_LOWERCASE'
+        },
+        'enabled_rules_only': True
+    },
+    'esl-focused': {
+        'enabled_categories': {
+            'GRAMMAR', 'TYPOS', 'CONFUSED_WORDS', 'COLLOCATIONS', 'NONSTANDARD_PHRASES', 'CASING'
+        },
+        'enabled_rules_only': True
+    }
+}
+DEFAULT_PROFILE = os.environ.get('GRAMMAR_DEFAULT_PROFILE', 'full')
+CHECK_PROFILE = os.environ.get('GRAMMAR_CHECK_PROFILE', 'quick')
+
+# Languages selectable per request. Each one gets its own analyzer and
+# LanguageTool servers, loaded on first use and unloaded when idle or when the
+# instance or memory cap is exceeded. The default language is never unloaded.
+DEFAULT_LANGUAGE = os.environ.get('GRAMMAR_DEFAULT_LANGUAGE', 'en-US')
+SUPPORTED_LANGUAGES = [
+    language.strip() for language in os.environ.get('GRAMMAR_LANGUAGES', 'en-US,en-GB').split(',')
+    if language.strip()
+]
+if DEFAULT_LANGUAGE not in SUPPORTED_LANGUAGES:
+    SUPPORTED_LANGUAGES.insert(0, DEFAULT_LANGUAGE)
+MAX_LANGUAGES = int(os.environ.get('GRAMMAR_MAX_LANGUAGES', '3'))
+LANGUAGE_IDLE_SECONDS = float(os.environ.get('GRAMMAR_LANGUAGE_IDLE_SECONDS', '900'))
+LANGUAGE_MEMORY_MB = int(os.environ.get('GRAMMAR_LANGUAGE_MEMORY_MB', '0'))
+LANGUAGE_EVICT_GRACE = float(os.environ.get('GRAMMAR_LANGUAGE_EVICT_GRACE', '30'))
+
+# Pre-filter in front of LanguageTool for quick checks: answers clean short
+# texts from a word Bloom filter and a few regexes, escalating when unsure
+PREFILTER_ENABLED = os.environ.get('GRAMMAR_PREFILTER', '1') == '1'
+PREFILTER_MAX_CHARS = int(os.environ.get('GRAMMAR_PREFILTER_MAX_CHARS', '400'))
+PREFILTER_WORDLIST = os.environ.get('GRAMMAR_WORDLIST', '/usr/share/dict/words')
+PREFILTER_CAPACITY = int(os.environ.get('GRAMMAR_PREFILTER_CAPACITY', '300000'))
+PREFILTER_AUDIT_RATE = float(os.environ.get('GRAMMAR_PREFILTER_AUDIT_RATE', '0.02'))
+
+# Batch analysis configuration
+POOL_SIZE = int(os.environ.get('GRAMMAR_POOL_SIZE', '2'))
+BATCH_MAX_ITEMS = int(os.environ.get('GRAMMAR_BATCH_MAX_ITEMS', '500'))
+
+# Long documents are split at sentence boundaries and checked in parallel
+PARALLEL_MIN_CHARS = int(os.environ.get('GRAMMAR_PARALLEL_MIN_CHARS', '6000'))
+CHUNK_CHARS = int(os.environ.get('GRAMMAR_CHUNK_CHARS', '2000'))
+CHUNK_OVERLAP_SENTENCES = int(os.environ.get('GRAMMAR_CHUNK_OVERLAP', '1'))
+
+# Micro-batching: short single-line texts wait a few milliseconds for company and
+# are checked together as one LanguageTool call
+MICROBATCH_ENABLED = os.environ.get('GRAMMAR_MICROBATCH', '1') == '1'
+MICROBATCH_WAIT_MS = float(os.environ.get('GRAMMAR_MICROBATCH_WAIT_MS', '5'))
+MICROBATCH_MAX_ITEMS = int(os.environ.get('GRAMMAR_MICROBATCH_MAX_ITEMS', '16'))
+MICROBATCH_MAX_CHARS = int(os.environ.get('GRAMMAR_MICROBATCH_MAX_CHARS', '500'))
+# Only profiles whose enabled rules are all sentence-local may share a check
+MICROBATCH_PROFILES = frozenset({'quick'})
+
+# Concurrent identical checks wait for the one in flight instead of repeating it
+COALESCE_ENABLED = os.environ.get('GRAMMAR_COALESCE', '1') == '1'
+
+# Startup warm-up: texts checked on each LanguageTool instance before it serves traffic
+WARMUP_FILE = os.environ.get('GRAMMAR_WARMUP_FILE')
+WARMUP_ROUNDS = int(os.environ.get('GRAMMAR_WARMUP_ROUNDS', '2'))
+WARMUP_TEXTS = [
+    "I am Korean student who want to study in America.",
+    "When I was young, my grandmother teach me how to make kimchi with our family.",
+    "Through this experience, I learned that leadership is not about being the loudest person in room.",
+    "Their are many reasons why I wants to major in computer science, and the most important one is my curiosity.",
+    "In high school I founded a coding club; we builded apps that helped students learn english."
+]
+# Seconds before a failed startup is retried by the next probe
+INIT_RETRY_SECONDS = float(os.environ.get('GRAMMAR_INIT_RETRY_SECONDS', '30'))
+
+SENTENCE_END_RE = re.compile(r'[.!?]+["\')\]]*\s+|\n+')
+# LanguageTool ends a paragraph only at a blank line
+PARAGRAPH_BREAK_RE = re.compile(r'\n\s*\n')
+
+# Text-level rules look beyond the current paragraph, so checking paragraphs
+# one at a time can miss or add their matches
+TEXT_LEVEL_RULES = frozenset({
+    'PARAGRAPH_REPEAT_BEGINNING_RULE',
+    'ENGLISH_WORD_REPEAT_BEGINNING_RULE',
+    'STYLE_REPEATED_WORD_RULE_EN',
+    'EN_UNPAIRED_BRACKETS',
+    'EN_UNPAIRED_QUOTES',
+    'PUNCTUATION_PARAGRAPH_END',
+    'TOO_LONG_PARAGRAPH'
+})
+
+def _create_tool(language='en-US'):
+    """Initialize LanguageTool, returning None when it cannot start"""
+    try:
+        lt = LanguageTool(language)
+        logger.info("LanguageTool initialized successfully")
+        return lt
+    except Exception as e:
+        logger.error(f"Failed to initialize LanguageTool: {e}")
+        _record_error('tool_init', e)
+        return None
+
+def _server_url(lt):
+    """Base URL of the LanguageTool server behind an instance, if known"""
+    url = getattr(lt, '_url', None)
+    if url and url.endswith('v2/'):
+        return url[:-len('v2/')]
+    return url
+
+def _create_profile_tool(base, profile, language):
+    """LanguageTool instance configured for a rule profile.
+
+    It talks to the server already started by `base`, so profiles do not
+    start extra JVMs.
+    """
+    settings = RULE_PROFILES[profile]
+    if not settings:
+        return base
+    url = _server_url(base)
+    lt = LanguageTool(language, remote_server=url) if url else LanguageTool(language)
+    for attr in ('enabled_rules', 'disabled_rules', 'enabled_categories', 'disabled_categories'):
+        setattr(lt, attr, set(settings.get(attr, ())))
+    lt.enabled_rules_only = settings.get('enabled_rules_only', False)
+    return lt
+
+def _match_to_dict(match):
+    """Convert a LanguageTool match into a plain, cacheable dict"""
+    return {
+        'ruleId': match.ruleId,
+        'category': match.category,
+        'message': match.message,
+        'replacements': list(match.replacements),
+        'offset': match.offset,
+        'errorLength': match.errorLength,
+        'context': match.context
+    }
+
+def _split_paragraphs(text):
+    """Split text into (start, chunk) pairs at blank lines, keeping the breaks in each chunk.
+
+    Single line breaks (hard-wrapped text) stay inside their paragraph, as they
+    do for LanguageTool.
+    """
+    chunks = []
+    start = 0
+    for boundary in PARAGRAPH_BREAK_RE.finditer(text):
+        chunks.append((start, text[start:boundary.end()]))
+        start = boundary.end()
+    if start < len(text):
+        chunks.append((start, text[start:]))
+    return chunks
+
+def _sentence_spans(text):
+    """(start, end) spans of sentences, each including its trailing whitespace"""
+    spans = []
+    start = 0
+    for boundary in SENTENCE_END_RE.finditer(text):
+        end = boundary.end()
+        if end > start:
+            spans.append((start, end))
+            start = end
+    if start < len(text):
+        spans.append((start, len(text)))
+    return spans
+
+def _overlapping_chunks(text, chunk_chars=CHUNK_CHARS, overlap=CHUNK_OVERLAP_SENTENCES):
+    """Group sentences into chunks of about chunk_chars.
+
+    Returns (context_start, context_end, own_start, own_end) tuples. The context
+    adds `overlap` sentences on each side so rules see neighbouring text; only
+    matches starting inside [own_start, own_end) belong to the chunk.
+    """
+    spans = _sentence_spans(text)
+    chunks = []
+    i = 0
+    while i < len(spans):
+        j = i + 1
+        while j < len(spans) and spans[j][1] - spans[i][0] <= chunk_chars:
+            j += 1
+        context_start = spans[max(0, i - overlap)][0]
+        context_end = spans[min(len(spans), j + overlap) - 1][1]
+        chunks.append((context_start, context_end, spans[i][0], spans[j - 1][1]))
+        i = j
+    return chunks
+
+def _shift_match(match, delta):
+    """Copy a match dict with its offset moved by delta"""
+    if not delta:
+        return match
+    shifted = dict(match)
+    shifted['offset'] = match['offset'] + delta
+    return shifted
+
+class BloomFilter:
+    """Fixed-size Bloom filter over strings (no deletions)"""
+
+    def __init__(self, capacity, error_rate=0.001):
+        bits = max(1024, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.capacity = capacity
+        self.size = bits
+        self.hashes = max(1, round(bits / capacity * math.log(2)))
+        self.bits = bytearray((bits + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item):
+        digest = hashlib.blake2b(item.encode('utf-8'), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        second = int.from_bytes(digest[8:], 'little') | 1
+        return [(first + i * second) % self.size for i in range(self.hashes)]
+
+    def is_full(self):
+        """Past capacity the false-positive rate climbs above the target"""
+        return self.count >= self.capacity
+
+    def add(self, item):
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+class QuickPrefilter:
+    """Cheap in-process answer for clean short texts.
+
+    A text is declared clean only when every word is in the known-word Bloom
+    filter and none of the ESL red-flag patterns match; anything else escalates
+    to LanguageTool. Known words come from GRAMMAR_WORDLIST and from texts
+    LanguageTool found free of spelling errors. Lookups are case-sensitive so
+    "english" is not accepted on the strength of "English"; only a
+    sentence-initial word may also match its lowercase form. A sample of
+    fast-path answers is re-checked with LanguageTool in the background to
+    measure accuracy.
+    """
+
+    WORD_RE = re.compile(r"[A-Za-z]+(?:'[A-Za-z]+)?")
+    RED_FLAGS = [
+        re.compile(r'\b(\w+)\s+\1\b', re.IGNORECASE),          # doubled word
+        re.compile(r'\ba\s+[aeiouAEIOU]'),                       # "a" before a vowel
+        re.compile(r'\ban\s+[b-df-hj-np-tv-zB-DF-HJ-NP-TV-Z]'),  # "an" before a consonant
+        re.compile(r'\bi\b'),                                     # lowercase "i"
+        re.compile(r'(?:^|[.!?]\s+)[a-z]'),                        # lowercase sentence start
+        re.compile(r'\s[,.;:!?]|[,;:]{2,}|[,;:][A-Za-z]|  '),     # spacing and punctuation
+        re.compile(r'[^\x00-\x7f]')                               # non-ASCII: leave to LanguageTool
+    ]
+
+    def __init__(self, wordlist=PREFILTER_WORDLIST, capacity=PREFILTER_CAPACITY,
+                 max_chars=PREFILTER_MAX_CHARS, audit_rate=PREFILTER_AUDIT_RATE):
+        self.known = BloomFilter(capacity)
+        self.max_chars = max_chars
+        self.audit_rate = audit_rate
+        self._lock = threading.Lock()
+        self._auditor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='prefilter-audit')
+        self.stats = {
+            'checks': 0,
+            'fast_path': 0,
+            'escalated': 0,
+            'escalated_clean': 0,
+            'audited': 0,
+            'audit_disagreements': 0
+        }
+        if wordlist and os.path.exists(wordlist):
+            self._load_wordlist(wordlist)
+
+    def _load_wordlist(self, path):
+        try:
+            with open(path, encoding='utf-8', errors='ignore') as words:
+                for line in words:
+                    word = line.strip()
+                    if self.known.is_full():
+                        break
+                    if word:
+                        self.known.add(word)
+            logger.info(f"Pre-filter loaded {self.known.count} words from {path}")
+        except OSError as e:
+            logger.error(f"Failed to load pre-filter word list: {e}")
+            _record_error('prefilter_wordlist', e)
+
+    def is_clean(self, text):
+        """True only when the text is confidently free of errors"""
+        if len(text) > self.max_chars or not text.strip():
+            return False
+        if any(pattern.search(text) for pattern in self.RED_FLAGS):
+            return False
+        words = list(self._words(text))
+        return bool(words) and all(self._is_known(word, initial) for word, initial in words)
+
+    def _words(self, text):
+        """Yield (word, sentence_initial) for each word in the text"""
+        for match in self.WORD_RE.finditer(text):
+            before = text[:match.start()].rstrip()
+            yield match.group(), not before or before[-1] in '.!?'
+
+    def _is_known(self, word, initial):
+        if word in self.known:
+            return True
+        # A capitalised sentence opener may be an ordinary lowercase word
+        return initial and word.lower() in self.known
+
+    def observe(self, text, matches):
+        """Learn from a LanguageTool result for an escalated text"""
+        with self._lock:
+            self.stats['escalated'] += 1
+            if not matches:
+                self.stats['escalated_clean'] += 1
+        if len(text) <= self.max_chars and not any(m['category'] == 'TYPOS' for m in matches):
+            for word, initial in self._words(text):
+                # A sentence opener's capital says nothing about how it is spelled elsewhere
+                if initial or word in self.known or self.known.is_full():
+                    continue
+                self.known.add(word)
+
+    def record_fast_path(self, text, verify):
+        """Count a fast-path answer and occasionally audit it with `verify(text)`"""
+        with self._lock:
+            self.stats['fast_path'] += 1
+        if self.audit_rate and random.random() < self.audit_rate:
+            self._auditor.submit(self._audit, text, verify)
+
+    def _audit(self, text, verify):
+        try:
+            matches = verify(text)
+        except Exception as e:
+            _record_error('prefilter_audit', e)
+            return
+        with self._lock:
+            self.stats['audited'] += 1
+            if matches:
+                self.stats['audit_disagreements'] += 1
+                logger.info(f"Pre-filter fast path missed {len(matches)} issue(s) in audited text")
+
+    def count_check(self):
+        with self._lock:
+            self.stats['checks'] += 1
+
+    def get_stats(self):
+        with self._lock:
+            stats = dict(self.stats)
+        stats['hit_rate'] = round(stats['fast_path'] / stats['checks'], 4) if stats['checks'] else 0.0
+        stats['accuracy'] = (
+            round(1 - stats['audit_disagreements'] / stats['audited'], 4) if stats['audited'] else None
+        )
+        stats['known_words'] = self.known.count
+        return stats
+
+    def close(self):
+        self._auditor.shutdown(wait=False)
+
+class IssueRecord:
+    """Compact issue built from a match; turned into a dict only when serialized"""
+    __slots__ = ('type', 'category', 'message', 'suggestion', 'offset', 'length', 'context', 'severity')
+    FIELDS = __slots__
+
+    def __init__(self, match, severity, delta=0):
+        self.type = match['ruleId']
+        self.category = match['category']
+        self.message = match['message']
+        self.suggestion = match['replacements'][0] if match['replacements'] else None
+        self.offset = match['offset'] + delta
+        self.length = match['errorLength']
+        self.context = match['context']
+        self.severity = severity
+
+def parse_issue_fields(fields):
+    """Validate a `fields` selection (list or comma-separated string); None means all"""
+    if fields is None or fields == '':
+        return None
+    if isinstance(fields, str):
+        fields = [field.strip() for field in fields.split(',') if field.strip()]
+    if not isinstance(fields, list) or not all(isinstance(field, str) for field in fields):
+        raise ValueError('fields must be a list or comma-separated string')
+    unknown = [field for field in fields if field not in IssueRecord.FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown issue fields: {', '.join(unknown)}")
+    return tuple(fields)
+
+def serialize_issues(records, fields=None, dedupe_messages=False):
+    """Turn issue records into dicts with only the selected fields.
+
+    With dedupe_messages, each distinct message is sent once in the returned
+    messages list and issues carry a `message_id` index into it instead.
+    Returns (issues, messages); messages is None when not deduplicating.
+    """
+    fields = fields or IssueRecord.FIELDS
+    if not dedupe_messages or 'message' not in fields:
+        return [{field: getattr(record, field) for field in fields} for record in records], None
+
+    message_ids = {}
+    issues = []
+    for record in records:
+        issue = {}
+        for field in fields:
+            if field == 'message':
+                issue['message_id'] = message_ids.setdefault(record.message, len(message_ids))
+            else:
+                issue[field] = getattr(record, field)
+        issues.append(issue)
+    return issues, list(message_ids)
+
+def _dumps_json(payload):
+    if orjson is not None:
+        return orjson.dumps(payload)
+    return json.dumps(payload, separators=(',', ':')).encode('utf-8')
+
+def encode_response(payload, accept='', accept_encoding=''):
+    """Serialize a payload according to the Accept and Accept-Encoding headers.
+
+    JSON (orjson when installed) by default, MessagePack when asked for and
+    available; bodies over COMPRESS_MIN_BYTES are zstd or gzip compressed.
+    Returns (body, headers).
+    """
+    offered = ['application/json']
+    if msgpack is not None:
+        offered += ['application/msgpack', 'application/x-msgpack']
+    mimetype = parse_accept_header(accept or '', MIMEAccept).best_match(offered) or 'application/json'
+
+    if mimetype == 'application/json':
+        body = _dumps_json(payload)
+    else:
+        body = msgpack.packb(payload, use_bin_type=True)
+    headers = {'Content-Type': mimetype, 'Vary': 'Accept, Accept-Encoding'}
+
+    if len(body) >= COMPRESS_MIN_BYTES:
+        codings = ['gzip'] if zstandard is None else ['zstd', 'gzip']
+        coding = parse_accept_header(accept_encoding or '').best_match(codings)
+        if coding == 'zstd':
+            body = zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(body)
+            headers['Content-Encoding'] = 'zstd'
+        elif coding == 'gzip':
+            body = gzip.compress(body, compresslevel=GZIP_LEVEL)
+            headers['Content-Encoding'] = 'gzip'
+
+    return body, headers
+
+def _rule_config(lt):
+    """Describe the rule configuration of a LanguageTool instance for cache keys"""
+    if lt is None:
+        return ''
+    parts = []
+    for attr in ('enabled_rules', 'disabled_rules', 'enabled_categories', 'disabled_categories'):
+        values = getattr(lt, attr, None) or ()
+        parts.append(f"{attr}={','.join(sorted(values))}")
+    parts.append(f"only={bool(getattr(lt, 'enabled_rules_only', False))}")
+    return ';'.join(parts)
+
+class MatchCache:
+    """Two-tier cache of LanguageTool matches: in-process LRU plus optional SQLite"""
+
+    def __init__(self, max_size=CACHE_SIZE, ttl=CACHE_TTL, db_path=CACHE_DB_PATH,
+                 db_max_rows=CACHE_DB_MAX_ROWS):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.db_path = db_path
+        self.db_max_rows = db_max_rows
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._writes = 0
+        self.stats = {
+            'hits': 0,
+            'disk_hits': 0,
+            'misses': 0,
+            'evictions': 0,
+            'expired': 0
+        }
+        if self.db_path:
+            try:
+                self._db().execute(
+                    'CREATE TABLE IF NOT EXISTS grammar_cache '
+                    '(key TEXT PRIMARY KEY, value TEXT NOT NULL, created REAL NOT NULL)'
+                )
+                self._db().commit()
+                logger.info(f"Grammar disk cache enabled at {self.db_path}")
+            except sqlite3.Error as e:
+                logger.error(f"Failed to open grammar disk cache: {e}")
+                _record_error('cache_init', e)
+                self.db_path = None
+
+    @staticmethod
+    def make_key(text, language, rule_config):
+        """Hash the text together with the language and rule configuration"""
+        digest = hashlib.sha256()
+        for part in (language or '', rule_config or '', text):
+            digest.update(part.encode('utf-8'))
+            digest.update(b'\0')
+        return digest.hexdigest()
+
+    def _db(self):
+        """Return this thread's SQLite connection (connections are not shared)"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=5)
+            conn.execute('PRAGMA journal_mode=WAL')
+            self._local.conn = conn
+        return conn
+
+    def get(self, key):
+        """Return cached matches for a key, or None on a miss"""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                created, value = entry
+                if now - created <= self.ttl:
+                    self._entries.move_to_end(key)
+                    self.stats['hits'] += 1
+                    return value
+                del self._entries[key]
+                self.stats['expired'] += 1
+
+        if self.db_path:
+            try:
+                row = self._db().execute(
+                    'SELECT value, created FROM grammar_cache WHERE key = ?', (key,)
+                ).fetchone()
+            except sqlite3.Error as e:
+                logger.error(f"Grammar disk cache read failed: {e}")
+                _record_error('cache_read', e)
+                row = None
+            if row is not None and now - row[1] <= self.ttl:
+                value = json.loads(row[0])
+                self._remember(key, value, row[1])
+                with self._lock:
+                    self.stats['disk_hits'] += 1
+                return value
+
+        with self._lock:
+            self.stats['misses'] += 1
+        return None
+
+    def peek(self, key):
+        """Fresh in-memory entry for a key, or None; no disk read and no stats"""
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is not None and time.time() - entry[0] <= self.ttl:
+            return entry[1]
+        return None
+    
+    def set(self, key, value):
+        """Store matches in both tiers"""
+        now = time.time()
+        self._remember(key, value, now)
+        if self.db_path:
+            try:
+                conn = self._db()
+                conn.execute(
+                    'INSERT OR REPLACE INTO grammar_cache (key, value, created) VALUES (?, ?, ?)',
+                    (key, json.dumps(value), now)
+                )
+                self._writes += 1
+                if self._writes % 100 == 0:
+                    self._prune_disk(conn, now)
+                conn.commit()
+            except sqlite3.Error as e:
+                logger.error(f"Grammar disk cache write failed: {e}")
+                _record_error('cache_write', e)
+
+    def _remember(self, key, value, created):
+        with self._lock:
+            self._entries[key] = (created, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.stats['evictions'] += 1
+
+    def _prune_disk(self, conn, now):
+        """Drop expired rows and keep the table within its row limit"""
+        conn.execute('DELETE FROM grammar_cache WHERE created < ?', (now - self.ttl,))
+        conn.execute(
+            'DELETE FROM grammar_cache WHERE key IN ('
+            'SELECT key FROM grammar_cache ORDER BY created DESC LIMIT -1 OFFSET ?)',
+            (self.db_max_rows,)
+        )
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self):
+        with self._lock:
+            lookups = self.stats['hits'] + self.stats['disk_hits'] + self.stats['misses']
+            hits = self.stats['hits'] + self.stats['disk_hits']
+            return {
+                **self.stats,
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'ttl': self.ttl,
+                'disk_enabled': bool(self.db_path),
+                'hit_rate': round(hits / lookups, 4) if lookups else 0.0
+            }
+
+class ToolPool:
+    """Fixed-size pool of LanguageTool instances, each backed by its own server process.
+
+    Extra instances are created on first demand and copy the rule configuration
+    of the primary instance so cached results stay interchangeable.
+    """
+
+    def __init__(self, size, language='en-US', primary=None):
+        self.size = max(1, size)
+        self.language = language
+        self.primary = primary
+        self._idle = queue.Queue()
+        self._lock = threading.Lock()
+        self._created = 0
+        if primary is not None:
+            self._idle.put(primary)
+            self._created = 1
+
+    def _create(self):
+        lt = LanguageTool(self.language)
+        if self.primary is not None:
+            for attr in ('enabled_rules', 'disabled_rules', 'enabled_categories', 'disabled_categories'):
+                setattr(lt, attr, set(getattr(self.primary, attr, None) or ()))
+            lt.enabled_rules_only = getattr(self.primary, 'enabled_rules_only', False)
+        logger.info(f"Created pooled LanguageTool instance ({self._created}/{self.size})")
+        try:
+            _warm_up_tool(lt)
+        except Exception as e:
+            logger.error(f"LanguageTool warm-up failed: {e}")
+            _record_error('warmup', e)
+        return lt
+
+    def acquire(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            create = self._created < self.size
+            if create:
+                self._created += 1
+        if create:
+            try:
+                return self._create()
+            except Exception:
+                with self._lock:
+                    self._created -= 1
+                raise
+        return self._idle.get()
+
+    def release(self, lt):
+        self._idle.put(lt)
+
+    @contextmanager
+    def borrow(self):
+        lt = self.acquire()
+        try:
+            yield lt
+        finally:
+            self.release(lt)
+
+    def close(self):
+        """Shut down idle instances and their LanguageTool servers"""
+        while True:
+            try:
+                lt = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                lt.close()
+            except Exception as e:
+                logger.error(f"Failed to close LanguageTool: {e}")
+                _record_error('pool_close', e)
+        with self._lock:
+            self._created = 0
+
+    def get_stats(self):
+        return {
+            'size': self.size,
+            'created': self._created,
+            'idle': self._idle.qsize()
+        }
+
+def _local_context(text, offset, length, width=40):
+    """Match context cut from text alone, in LanguageTool's '...' window style"""
+    start = max(0, offset - width)
+    end = min(len(text), offset + length + width)
+    return ('...' if start > 0 else '') + text[start:end] + ('...' if end < len(text) else '')
+
+class MicroBatcher:
+    """Join short concurrent checks into one LanguageTool call.
+
+    The first text submitted for a tool opens a batch and waits up to `max_wait_ms`
+    (less if the batch fills up) for others. The batch is checked as one text with
+    the items separated by blank lines, which LanguageTool treats as paragraph
+    breaks, and the matches are split back per item with re-based offsets. Only
+    single-line texts without surrounding whitespace are accepted, so no item can
+    interact with the separator. Callers batch only profiles whose rules are all
+    sentence-local (MICROBATCH_PROFILES), since text-level rules would see the
+    neighbouring items; TEXT_LEVEL_RULES matches are dropped as a safeguard.
+    """
+
+    SEPARATOR = '\n\n'
+
+    class _Item:
+        __slots__ = ('text', 'done', 'matches', 'error')
+
+        def __init__(self, text):
+            self.text = text
+            self.done = threading.Event()
+            self.matches = None
+            self.error = None
+
+    class _Batch:
+        __slots__ = ('items', 'full')
+
+        def __init__(self):
+            self.items = []
+            self.full = threading.Event()
+
+    def __init__(self, max_wait_ms=MICROBATCH_WAIT_MS, max_items=MICROBATCH_MAX_ITEMS,
+                 max_chars=MICROBATCH_MAX_CHARS):
+        self.max_wait = max_wait_ms / 1000
+        self.max_items = max(1, max_items)
+        self.max_chars = max_chars
+        self._open = {}
+        self._lock = threading.Lock()
+        self.stats = {
+            'batches': 0,
+            'batched_items': 0,
+            'solo': 0,
+            'largest': 0
+        }
+
+    def accepts(self, text):
+        return 0 < len(text) <= self.max_chars and text == text.strip() and '\n' not in text
+
+    def submit(self, text, lt):
+        """Matches (as dicts) for text, checked together with concurrent submissions"""
+        item = self._Item(text)
+        group = id(lt)
+        with self._lock:
+            batch = self._open.get(group)
+            leader = batch is None
+            if leader:
+                batch = self._open[group] = self._Batch()
+            batch.items.append(item)
+            if len(batch.items) >= self.max_items:
+                # Close the batch; later arrivals open a new one
+                del self._open[group]
+                batch.full.set()
+        
+        if leader:
+            batch.full.wait(self.max_wait)
+            with self._lock:
+                if self._open.get(group) is batch:
+                    del self._open[group]
+            self._run(batch.items, lt)
+        else:
+            item.done.wait()
+        
+        if item.error is not None:
+            raise item.error
+        return item.matches
+
+    def _run(self, items, lt):
+        """Check a batch; every item gets its matches or the error, even if splitting fails"""
+        try:
+            texts = [item.text for item in items]
+            joined = self.SEPARATOR.join(texts)
+            starts = []
+            position = 0
+            for text in texts:
+                starts.append(position)
+                position += len(text) + len(self.SEPARATOR)
+            
+            bucket = _length_bucket(joined)
+            started = time.perf_counter()
+            try:
+                raw_matches = lt.check(joined)
+            finally:
+                CHECK_LATENCY.labels(length_bucket=bucket).observe(time.perf_counter() - started)
+            CHECK_MATCHES.labels(length_bucket=bucket).observe(len(raw_matches))
+            
+            per_item = [[] for _ in items]
+            for raw in raw_matches:
+                match = _match_to_dict(raw)
+                index = bisect.bisect_right(starts, match['offset']) - 1
+                text = texts[index]
+                offset = match['offset'] - starts[index]
+                if offset + match['errorLength'] > len(text):
+                    continue
+                if len(items) > 1 and match['ruleId'] in TEXT_LEVEL_RULES:
+                    continue
+                if len(items) > 1:
+                    match['offset'] = offset
+                    match['context'] = _local_context(text, offset, match['errorLength'])
+                per_item[index].append(match)
+            
+            with self._lock:
+                if len(items) > 1:
+                    self.stats['batches'] += 1
+                    self.stats['batched_items'] += len(items)
+                    self.stats['largest'] = max(self.stats['largest'], len(items))
+                else:
+                    self.stats['solo'] += 1
+            for item, matches in zip(items, per_item):
+                item.matches = matches
+        except Exception as e:
+            _record_error('tool_check', e)
+            for item in items:
+                item.error = e
+        finally:
+            for item in items:
+                item.done.set()
+
+    def get_stats(self):
+        with self._lock:
+            stats = dict(self.stats)
+        stats['avg_batch_size'] = (
+            round(stats['batched_items'] / stats['batches'], 2) if stats['batches'] else 0.0
+        )
+        stats['max_wait_ms'] = self.max_wait * 1000
+        stats['max_items'] = self.max_items
+        return stats
+
+class SingleFlight:
+    """Coalesce concurrent calls that share a key into one execution.
+
+    The first caller runs the function; callers arriving while it is still in
+    flight wait for it and get the same result, or the same exception. When
+    disabled every caller runs the function itself.
+    """
+
+    class _Call:
+        __slots__ = ('done', 'result', 'error')
+
+        def __init__(self):
+            self.done = threading.Event()
+            self.result = None
+            self.error = None
+
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.stats = {
+            'executed': 0,
+            'coalesced': 0
+        }
+
+    def do(self, key, fn):
+        if not self.enabled:
+            with self._lock:
+                self.stats['executed'] += 1
+            return fn()
+
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = self._Call()
+                self.stats['executed'] += 1
+            else:
+                self.stats['coalesced'] += 1
+
+        if not leader:
+            COALESCED_CHECKS.inc()
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def get_stats(self):
+        with self._lock:
+            stats = dict(self.stats)
+            stats['in_flight'] = len(self._calls)
+        total = stats['executed'] + stats['coalesced']
+        stats['coalesce_rate'] = round(stats['coalesced'] / total, 4) if total else 0.0
+        return stats
 
 class GrammarAnalyzer:
-    def __init__(self):
-        self.tool = tool
+    severity_map = {
+        'GRAMMAR': 'high',
+        'SPELLING': 'medium',
+        'STYLE': 'low',
+        'PUNCTUATION': 'medium',
+        'TYPOS': 'low'
+    }
+    
+    def __init__(self, language='en-US', cache=None, pool=None, lt=None):
+        self.tool = lt if lt is not None else _create_tool(language)
+        self.language = language
+        self.cache = cache if cache is not None else MatchCache()
+        self.pool = pool if pool is not None else ToolPool(POOL_SIZE, language, self.tool)
+        self._profile_tools = {}
+        self._profile_lock = threading.Lock()
+        self.inflight = SingleFlight(COALESCE_ENABLED)
+        self._leases = 0
+        self._retired = False
+        self._lease_lock = threading.Lock()
+        self.batcher = MicroBatcher() if MICROBATCH_ENABLED and MICROBATCH_MAX_ITEMS > 1 else None
+        # The pre-filter only knows English, and the system word list is US spelling
+        self.prefilter = None
+        if PREFILTER_ENABLED and language.startswith('en'):
+            self.prefilter = QuickPrefilter(PREFILTER_WORDLIST if language == 'en-US' else None)
         self.error_categories = {
             'GRAMMAR': 'Grammar errors',
             'SPELLING': 'Spelling mistakes',
@@ -37,7 +1040,8 @@ class GrammarAnalyzer:
             'TYPOS': 'Typographical errors'
         }
     
-    def analyze_text(self, text):
+    def analyze_text(self, text, incremental=INCREMENTAL_DEFAULT, lt=None, fields=None,
+                     dedupe_messages=False, profile=DEFAULT_PROFILE):
         """Analyze text for grammar, spelling, and style errors"""
         if not self.tool:
             return {
@@ -47,54 +1051,293 @@ class GrammarAnalyzer:
             }
         
         try:
-            # Get matches from LanguageTool
-            matches = self.tool.check(text)
-            
-            # Process matches
-            issues = []
-            total_errors = len(matches)
-            
-            for match in matches:
-                issue = {
-                    'type': match.ruleId,
-                    'category': match.category,
-                    'message': match.message,
-                    'suggestion': match.replacements[0] if match.replacements else None,
-                    'offset': match.offset,
-                    'length': match.errorLength,
-                    'context': match.context,
-                    'severity': self._get_severity(match.category)
-                }
-                issues.append(issue)
-            
-            # Calculate grammar score (0-100)
-            score = max(0, 100 - (total_errors * 5))  # -5 points per error
+            matches = self.get_matches(text, incremental, lt, profile)
+            return self._analysis_from_matches(matches, fields, dedupe_messages)
             
+        except Exception as e:
+            logger.error(f"Error analyzing text: {e}")
+            _record_error('analyzer.analyze_text', e)
+            return {
+                'error': str(e),
+                'score': 0,
+                'issues': []
+            }
+    
+    def analyze_full(self, text, incremental=INCREMENTAL_DEFAULT, fields=None, dedupe_messages=False,
+                     profile=DEFAULT_PROFILE):
+        """Score, issues, summary, suggestions and quick-check info from a single check"""
+        if not self.tool:
             return {
-                'score': score,
-                'total_errors': total_errors,
-                'issues': issues,
-                'summary': self._generate_summary(issues)
+                'error': 'LanguageTool not available',
+                'score': 0,
+                'issues': [],
+                'suggestions': []
             }
+        
+        try:
+            matches = self.get_matches(text, incremental, profile=profile)
+            result = self._analysis_from_matches(matches, fields, dedupe_messages)
+            result['suggestions'] = self._suggestions_from_matches(text, matches)
+            result['has_errors'] = len(matches) > 0
+            return result
             
         except Exception as e:
-            logger.error(f"Error analyzing text: {e}")
+            logger.error(f"Error running full analysis: {e}")
+            _record_error('analyzer.analyze_full', e)
             return {
                 'error': str(e),
                 'score': 0,
-                'issues': []
+                'issues': [],
+                'suggestions': []
             }
     
+    def quick_check(self, text, profile=CHECK_PROFILE):
+        """Error count and score only"""
+        prefilter = self.prefilter if profile == 'quick' else None
+        if prefilter is not None:
+            prefilter.count_check()
+            if prefilter.is_clean(text):
+                prefilter.record_fast_path(text, lambda audited: self.get_matches(audited, profile=profile))
+                return {'has_errors': False, 'error_count': 0, 'score': 100}
+        
+        matches = self.get_matches(text, profile=profile)
+        if prefilter is not None:
+            prefilter.observe(text, matches)
+        return {
+            'has_errors': len(matches) > 0,
+            'error_count': len(matches),
+            'score': self._calculate_score(len(matches))
+        }
+    
+    def get_matches(self, text, incremental=False, lt=None, profile=DEFAULT_PROFILE):
+        """Get matches from LanguageTool (or the result cache)"""
+        if incremental:
+            return self.check_incremental(text, lt, profile)
+        # Callers that already hold a pooled tool (batch items) stay sequential
+        if lt is None and self._should_parallelize(text):
+            return self.check_parallel(text, profile)
+        return self.check(text, lt, profile, batchable=lt is None)
+    
+    def _should_parallelize(self, text):
+        return 0 < PARALLEL_MIN_CHARS <= len(text) and self.pool.size > 1
+    
+    def check_parallel(self, text, profile=DEFAULT_PROFILE):
+        """Check a long text as overlapping sentence-aligned chunks across the tool pool.
+
+        Matches are re-based to full-text offsets. Each match is kept only by the
+        chunk that owns its start offset, which drops the duplicates found in the
+        overlap regions.
+        """
+        chunks = _overlapping_chunks(text)
+        if len(chunks) <= 1:
+            return self.check(text, profile=profile)
+        
+        def check_chunk(chunk):
+            context_start, context_end, own_start, own_end = chunk
+            with self.pool.borrow() as lt:
+                matches = self.check(text[context_start:context_end], lt, profile)
+            owned = []
+            for match in matches:
+                offset = match['offset'] + context_start
+                if own_start <= offset < own_end:
+                    owned.append(_shift_match(match, context_start))
+            return owned
+        
+        workers = min(self.pool.size, len(chunks))
+        with self.lease(), ThreadPoolExecutor(max_workers=workers) as executor:
+            chunk_matches = list(executor.map(check_chunk, chunks))
+        
+        matches = []
+        seen = set()
+        for owned in chunk_matches:
+            for match in owned:
+                key = (match['offset'], match['errorLength'], match['ruleId'])
+                if key not in seen:
+                    seen.add(key)
+                    matches.append(match)
+        return matches
+    
+    def analyze_batch(self, texts, incremental=INCREMENTAL_DEFAULT, fields=None, dedupe_messages=False,
+                      profile=DEFAULT_PROFILE):
+        """Analyze many texts across the tool pool; results keep input order"""
+        started = time.perf_counter()
+        
+        def analyze_one(index, text):
+            if not isinstance(text, str) or not text.strip():
+                return {'index': index, 'error': 'Text cannot be empty'}
+            try:
+                with self.pool.borrow() as lt:
+                    result = self.analyze_text(
+                        text, incremental, lt, fields, dedupe_messages, profile
+                    )
+            except Exception as e:
+                logger.error(f"Error analyzing batch item {index}: {e}")
+                _record_error('analyzer.analyze_batch', e)
+                result = {'error': str(e)}
+            result['index'] = index
+            return result
+        
+        workers = min(self.pool.size, max(1, len(texts)))
+        with self.lease(), ThreadPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(analyze_one, range(len(texts)), texts))
+        
+        elapsed = time.perf_counter() - started
+        failed = sum(1 for result in results if 'error' in result)
+        total_chars = sum(len(text) for text in texts if isinstance(text, str))
+        return {
+            'results': results,
+            'stats': {
+                'count': len(texts),
+                'succeeded': len(texts) - failed,
+                'failed': failed,
+                'workers': workers,
+                'elapsed_ms': round(elapsed * 1000, 2),
+                'texts_per_second': round(len(texts) / elapsed, 2) if elapsed else None,
+                'chars_per_second': round(total_chars / elapsed, 2) if elapsed else None
+            }
+        }
+    
+    def _analysis_from_matches(self, matches, fields=None, dedupe_messages=False):
+        """Build the /analyze result from already computed matches"""
+        records = [self._issue_from_match(match) for match in matches]
+        issues, messages = serialize_issues(records, fields, dedupe_messages)
+        
+        result = {
+            'score': self._calculate_score(len(records)),
+            'total_errors': len(records),
+            'issues': issues,
+            'summary': self._generate_summary(records)
+        }
+        if messages is not None:
+            result['messages'] = messages
+        return result
+    
+    def _issue_from_match(self, match, delta=0):
+        return IssueRecord(match, self._get_severity(match['category']), delta)
+    
+    def iter_analysis(self, text, fields=None, profile=DEFAULT_PROFILE):
+        """Yield issue records paragraph by paragraph, then a final summary record.
+
+        Paragraphs are split at blank lines and checked (and cached) individually
+        exactly as in incremental mode, so the issues and score match incremental
+        /analyze, and the first issues are available as soon as the first
+        paragraph is done. Hard-wrapped lines stay in their paragraph.
+        """
+        issues = []
+        paragraph = 0
+        with self.lease():
+            for start, chunk in _split_paragraphs(text):
+                if not chunk.strip():
+                    continue
+                chunk_issues = [
+                    self._issue_from_match(match, start)
+                    for match in self.check(chunk, profile=profile)
+                ]
+                issues.extend(chunk_issues)
+                yield {
+                    'type': 'issues',
+                    'paragraph': paragraph,
+                    'offset': start,
+                    'issues': serialize_issues(chunk_issues, fields)[0]
+                }
+                paragraph += 1
+        
+        yield {
+            'type': 'summary',
+            'score': self._calculate_score(len(issues)),
+            'total_errors': len(issues),
+            'paragraphs': paragraph,
+            'summary': self._generate_summary(issues)
+        }
+    
+    def _calculate_score(self, total_errors):
+        """Calculate grammar score (0-100)"""
+        return max(0, 100 - (total_errors * 5))  # -5 points per error
+    
     def _get_severity(self, category):
         """Determine severity level of an error"""
-        severity_map = {
-            'GRAMMAR': 'high',
-            'SPELLING': 'medium',
-            'STYLE': 'low',
-            'PUNCTUATION': 'medium',
-            'TYPOS': 'low'
-        }
-        return severity_map.get(category, 'medium')
+        return self.severity_map.get(category, 'medium')
+    
+    def tool_for(self, profile, base=None):
+        """Instance configured for a rule profile, sharing the server of `base`"""
+        base = base or self.tool
+        if not RULE_PROFILES[profile]:
+            return base
+        key = (id(base), profile)
+        lt = self._profile_tools.get(key)
+        if lt is None:
+            with self._profile_lock:
+                lt = self._profile_tools.get(key)
+                if lt is None:
+                    lt = _create_profile_tool(base, profile, self.language)
+                    self._profile_tools[key] = lt
+        return lt
+    
+    def check(self, text, lt=None, profile=DEFAULT_PROFILE, batchable=False):
+        """Return LanguageTool matches for text as dicts, served from the cache when possible.
+
+        Concurrent misses for the same text and rule configuration share one
+        LanguageTool call. With `batchable`, short texts checked with a
+        sentence-local profile may be micro-batched with other concurrent checks.
+        """
+        lt = self.tool_for(profile, lt)
+        key = MatchCache.make_key(text, self.language, _rule_config(lt))
+        matches = self.cache.get(key)
+        if matches is None:
+            if (batchable and profile in MICROBATCH_PROFILES and self.batcher is not None
+                    and self.batcher.accepts(text)):
+                matches = self.inflight.do(key, lambda: self._check_batched(text, lt, key))
+            else:
+                matches = self.inflight.do(key, lambda: self._check_uncached(text, lt, key))
+        return matches
+    
+    def _check_batched(self, text, lt, key):
+        # The previous leader for this key may have finished after our cache miss
+        matches = self.cache.peek(key)
+        if matches is not None:
+            return matches
+        matches = self.batcher.submit(text, lt)
+        self.cache.set(key, matches)
+        return matches
+    
+    def _check_uncached(self, text, lt, key):
+        # The previous leader for this key may have finished after our cache miss
+        matches = self.cache.peek(key)
+        if matches is not None:
+            return matches
+        bucket = _length_bucket(text)
+        started = time.perf_counter()
+        try:
+            raw_matches = lt.check(text)
+        except Exception as e:
+            _record_error('tool_check', e)
+            raise
+        finally:
+            CHECK_LATENCY.labels(length_bucket=bucket).observe(time.perf_counter() - started)
+        CHECK_MATCHES.labels(length_bucket=bucket).observe(len(raw_matches))
+        matches = [_match_to_dict(match) for match in raw_matches]
+        self.cache.set(key, matches)
+        return matches
+    
+    def check_incremental(self, text, lt=None, profile=DEFAULT_PROFILE):
+        """Check text paragraph by paragraph so only edited paragraphs reach LanguageTool.
+
+        Paragraphs are separated by blank lines, as LanguageTool splits them. Each
+        goes through the result cache on its own; cached matches are shifted back
+        to offsets in the full text. The result equals a full check except for the
+        rules in TEXT_LEVEL_RULES, which here only see one paragraph at a time.
+        """
+        chunks = _split_paragraphs(text)
+        if len(chunks) <= 1:
+            return self.check(text, lt, profile)
+        matches = []
+        for start, chunk in chunks:
+            if not chunk.strip():
+                continue
+            matches.extend(
+                _shift_match(match, start) for match in self.check(chunk, lt, profile)
+            )
+        return matches
     
     def _generate_summary(self, issues):
         """Generate a summary of grammar issues"""
@@ -103,7 +1346,7 @@ class GrammarAnalyzer:
         
         categories = {}
         for issue in issues:
-            cat = issue['category']
+            cat = issue.category
             categories[cat] = categories.get(cat, 0) + 1
         
         summary_parts = []
@@ -112,43 +1355,465 @@ class GrammarAnalyzer:
         
         return f"Found {len(issues)} total issues: {', '.join(summary_parts)}."
     
-    def get_suggestions(self, text):
+    def get_suggestions(self, text, incremental=INCREMENTAL_DEFAULT, profile=DEFAULT_PROFILE):
         """Get specific suggestions for improving the text"""
         if not self.tool:
             return []
         
         try:
-            matches = self.tool.check(text)
-            suggestions = []
-            
-            for match in matches:
-                if match.replacements:
-                    suggestion = {
-                        'original': text[match.offset:match.offset + match.errorLength],
-                        'suggestion': match.replacements[0],
-                        'explanation': match.message,
-                        'category': match.category
-                    }
-                    suggestions.append(suggestion)
-            
-            return suggestions
+            matches = self.get_matches(text, incremental, profile=profile)
+            return self._suggestions_from_matches(text, matches)
             
         except Exception as e:
             logger.error(f"Error getting suggestions: {e}")
+            _record_error('analyzer.get_suggestions', e)
             return []
+    
+    def _suggestions_from_matches(self, text, matches):
+        """Build suggestions from already computed matches"""
+        suggestions = []
+        
+        for match in matches:
+            if match['replacements']:
+                offset = match['offset']
+                suggestion = {
+                    'original': text[offset:offset + match['errorLength']],
+                    'suggestion': match['replacements'][0],
+                    'explanation': match['message'],
+                    'category': match['category']
+                }
+                suggestions.append(suggestion)
+        
+        return suggestions
+    
+    @contextmanager
+    def lease(self):
+        """Keep the analyzer open for a long operation that borrows pooled instances"""
+        with self._lease_lock:
+            self._leases += 1
+        try:
+            yield self
+        finally:
+            with self._lease_lock:
+                self._leases -= 1
+                close = self._retired and self._leases == 0
+            if close:
+                self.close()
+    
+    def retire(self):
+        """Close now, or when the last lease ends if an operation still holds one"""
+        with self._lease_lock:
+            self._retired = True
+            close = self._leases == 0
+        if close:
+            self.close()
+    
+    def close(self):
+        """Shut down this analyzer's LanguageTool servers and background threads"""
+        self.pool.close()
+        if self.prefilter is not None:
+            self.prefilter.close()
+
+def _tool_memory_mb():
+    """Memory of this process's child processes, i.e. its LanguageTool servers"""
+    return sum(rss_mb(child) for child in child_pids(os.getpid()))
+
+class LanguageRegistry:
+    """Per-language analyzers, loaded on first use and unloaded least-recently-used first.
+
+    All languages share one result cache (keys include the language). An
+    analyzer is unloaded when it has been idle for `idle_seconds`, when more
+    than `max_languages` are loaded, or when the LanguageTool servers together
+    exceed `memory_mb`. Its servers are closed after a grace period so requests
+    still using it can finish, or later, once batches, long parallel checks and
+    streams holding a lease have returned their pooled instances. The default
+    language stays loaded.
+    """
+
+    def __init__(self, default_language=DEFAULT_LANGUAGE, languages=SUPPORTED_LANGUAGES,
+                 max_languages=MAX_LANGUAGES, idle_seconds=LANGUAGE_IDLE_SECONDS,
+                 memory_mb=LANGUAGE_MEMORY_MB, evict_grace=LANGUAGE_EVICT_GRACE):
+        self.default_language = default_language
+        self.languages = list(languages)
+        self.max_languages = max(1, max_languages)
+        self.idle_seconds = idle_seconds
+        self.memory_mb = memory_mb
+        self.evict_grace = evict_grace
+        self.cache = MatchCache()
+        self._analyzers = OrderedDict()
+        self._last_used = {}
+        self._loading = {}
+        self._lock = threading.Lock()
+        self._closed = threading.Event()
+        self._reaper = None
+        self.stats = {
+            'loads': 0,
+            'idle_evictions': 0,
+            'cap_evictions': 0,
+            'memory_evictions': 0
+        }
+    
+    def get(self, language=None):
+        """Analyzer for a language, loading it if needed"""
+        language = language or self.default_language
+        if language not in self.languages:
+            raise ValueError(f"Unsupported language: {language}. Available: {', '.join(self.languages)}")
+        
+        with self._lock:
+            analyzer = self._touch(language)
+            if analyzer is not None:
+                return analyzer
+            # One loader per language; other languages are not blocked meanwhile
+            loading = self._loading.setdefault(language, threading.Lock())
+        
+        with loading:
+            with self._lock:
+                analyzer = self._touch(language)
+            if analyzer is None:
+                started = time.perf_counter()
+                analyzer = GrammarAnalyzer(language, cache=self.cache)
+                logger.info(f"Loaded {language} analyzer in {time.perf_counter() - started:.1f}s")
+                with self._lock:
+                    self._analyzers[language] = analyzer
+                    self._last_used[language] = time.monotonic()
+                    self.stats['loads'] += 1
+                self._enforce_limits()
+                self._start_reaper()
+        return analyzer
+    
+    def discard(self, language=None):
+        """Unload an analyzer (e.g. one whose LanguageTool failed to start) so the next get reloads it"""
+        language = language or self.default_language
+        with self._lock:
+            analyzer = self._analyzers.pop(language, None)
+            self._last_used.pop(language, None)
+        if analyzer is not None:
+            analyzer.close()
+    
+    def peek(self, language=None):
+        """Loaded analyzer for a language, or None; never loads"""
+        with self._lock:
+            return self._analyzers.get(language or self.default_language)
+    
+    def _touch(self, language):
+        analyzer = self._analyzers.get(language)
+        if analyzer is not None:
+            self._analyzers.move_to_end(language)
+            self._last_used[language] = time.monotonic()
+        return analyzer
+    
+    def _evictable(self):
+        """Loaded languages other than the default, least recently used first"""
+        return [language for language in self._analyzers if language != self.default_language]
+    
+    def _enforce_limits(self):
+        with self._lock:
+            evictable = self._evictable()
+            while len(self._analyzers) > self.max_languages and evictable:
+                self._evict(evictable.pop(0), 'cap')
+            # Servers shut down after the grace period, so evict one at a time
+            if self.memory_mb and evictable and _tool_memory_mb() > self.memory_mb:
+                self._evict(evictable.pop(0), 'memory')
+    
+    def evict_idle(self):
+        """Unload analyzers unused for longer than the idle timeout"""
+        now = time.monotonic()
+        with self._lock:
+            for language in self._evictable():
+                if now - self._last_used[language] > self.idle_seconds:
+                    self._evict(language, 'idle')
+    
+    def _evict(self, language, reason):
+        analyzer = self._analyzers.pop(language)
+        del self._last_used[language]
+        self.stats[f'{reason}_evictions'] += 1
+        logger.info(f"Unloading {language} analyzer ({reason} eviction)")
+        # Short requests finish within the grace period; batches and streams hold a lease
+        timer = threading.Timer(self.evict_grace, analyzer.retire)
+        timer.daemon = True
+        timer.start()
+    
+    def _start_reaper(self):
+        if self._reaper is not None or not self.idle_seconds:
+            return
+        self._reaper = threading.Thread(target=self._reap, name='language-reaper', daemon=True)
+        self._reaper.start()
+    
+    def _reap(self):
+        interval = min(60.0, max(1.0, self.idle_seconds / 2))
+        while not self._closed.wait(interval):
+            try:
+                self.evict_idle()
+            except Exception as e:
+                logger.error(f"Failed to evict idle analyzers: {e}")
+                _record_error('language_evict', e)
+    
+    def close(self):
+        """Shut down every loaded analyzer immediately"""
+        self._closed.set()
+        with self._lock:
+            analyzers = list(self._analyzers.values())
+            self._analyzers.clear()
+            self._last_used.clear()
+        for analyzer in analyzers:
+            analyzer.close()
+    
+    def get_stats(self):
+        now = time.monotonic()
+        with self._lock:
+            loaded = {
+                language: {
+                    'idle_seconds': round(now - self._last_used[language], 1),
+                    'pool': analyzer.pool.get_stats()
+                }
+                for language, analyzer in self._analyzers.items()
+            }
+        return {
+            **self.stats,
+            'default': self.default_language,
+            'available': self.languages,
+            'max_loaded': self.max_languages,
+            'idle_timeout': self.idle_seconds,
+            'memory_limit_mb': self.memory_mb,
+            'tool_memory_mb': round(_tool_memory_mb(), 1),
+            'loaded': loaded
+        }
+
+# Analyzers (and their LanguageTool servers) are created on first use, so that
+# every pre-forked worker process owns its own instances
+_registry = None
+_registry_lock = threading.Lock()
+
+# Background startup state, reported by the readiness probe
+_ready = threading.Event()
+_startup_lock = threading.Lock()
+_startup = {'state': 'idle'}
+
+def get_registry():
+    """Return this process's language registry, creating it on first use"""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = LanguageRegistry()
+    return _registry
+
+def get_analyzer(language=None):
+    """Return this process's analyzer for a language (default language if None).
+
+    Raises ValueError for languages that are not configured.
+    """
+    return get_registry().get(language)
+
+def shutdown_analyzer():
+    """Release this process's LanguageTool instances"""
+    global _registry
+    with _registry_lock:
+        _ready.clear()
+        _startup.update(state='stopped')
+        if _registry is not None:
+            _registry.close()
+            _registry = None
+
+def _load_warmup_corpus():
+    """Warm-up texts from GRAMMAR_WARMUP_FILE (blank-line separated) or the built-in set"""
+    if WARMUP_FILE:
+        try:
+            with open(WARMUP_FILE, encoding='utf-8') as corpus:
+                texts = [text.strip() for text in corpus.read().split('\n\n') if text.strip()]
+            if texts:
+                return texts
+        except OSError as e:
+            logger.error(f"Failed to read warm-up corpus {WARMUP_FILE}: {e}")
+            _record_error('warmup_corpus', e)
+    return WARMUP_TEXTS
+
+def _warm_up_tool(lt):
+    """Run the warm-up corpus on one instance, bypassing the result cache"""
+    if WARMUP_ROUNDS <= 0:
+        return
+    corpus = _load_warmup_corpus()
+    started = time.perf_counter()
+    for _ in range(WARMUP_ROUNDS):
+        for text in corpus:
+            lt.check(text)
+    logger.info(f"Warmed up LanguageTool instance in {time.perf_counter() - started:.1f}s")
+
+def _warm_up(analyzer):
+    """Warm up the primary instance; extra pooled instances are warmed when first created"""
+    with analyzer.pool.borrow() as lt:
+        _warm_up_tool(lt)
+
+def _initialize():
+    started = time.perf_counter()
+    try:
+        _startup.update(state='initializing')
+        analyzer = get_analyzer()
+        if analyzer.tool is None:
+            # Drop the broken analyzer so a retry starts LanguageTool again
+            get_registry().discard()
+            _startup.update(state='failed', error='LanguageTool not available', failed_at=time.time())
+            return
+        _startup['init_seconds'] = round(time.perf_counter() - started, 2)
+        
+        _startup.update(state='warming')
+        warm_started = time.perf_counter()
+        _warm_up(analyzer)
+        _startup['warmup_seconds'] = round(time.perf_counter() - warm_started, 2)
+        
+        _startup.update(state='ready')
+        _ready.set()
+        logger.info(f"Grammar service ready in {time.perf_counter() - started:.1f}s")
+    except Exception as e:
+        logger.error(f"Grammar service startup failed: {e}")
+        _record_error('startup', e)
+        _startup.update(state='failed', error=str(e), failed_at=time.time())
+
+def _claim_startup():
+    """True when the caller should run startup: idle, stopped, or failed long enough ago"""
+    with _startup_lock:
+        state = _startup['state']
+        if state == 'failed':
+            if time.time() - _startup['failed_at'] < INIT_RETRY_SECONDS:
+                return False
+        elif state not in ('idle', 'stopped'):
+            return False
+        _startup.clear()
+        _startup.update(state='starting')
+        return True
+
+def start_background_init():
+    """Create and warm up the analyzer off the request path.
+
+    Idempotent while starting or ready; a failed startup is retried once
+    INIT_RETRY_SECONDS have passed.
+    """
+    if _claim_startup():
+        threading.Thread(target=_initialize, name='grammar-init', daemon=True).start()
+
+def initialize():
+    """Create and warm up the analyzer in the calling thread; True once ready"""
+    if _claim_startup():
+        _initialize()
+    return is_ready()
+
+def is_ready():
+    return _ready.is_set()
+
+def readiness_state():
+    """Copy of the startup state: stage, timings and any error"""
+    return dict(_startup)
+
+def _route_label():
+    return request.url_rule.rule if request.url_rule is not None else 'unmatched'
 
-# Initialize analyzer
-analyzer = GrammarAnalyzer()
+@app.before_request
+def _start_request_metrics():
+    request.environ['grammar.started'] = time.perf_counter()
+    IN_FLIGHT.labels(route=_route_label()).inc()
+
+@app.after_request
+def _record_request_metrics(response):
+    route = _route_label()
+    REQUESTS.labels(route=route, method=request.method, status=str(response.status_code)).inc()
+    return response
+
+@app.teardown_request
+def _finish_request_metrics(exc):
+    started = request.environ.pop('grammar.started', None)
+    if started is None:
+        return
+    route = _route_label()
+    IN_FLIGHT.labels(route=route).dec()
+    REQUEST_LATENCY.labels(route=route).observe(time.perf_counter() - started)
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Prometheus metrics in text exposition format"""
+    body, content_type = render_metrics()
+    return Response(body, mimetype=content_type)
+
+@app.route('/health/live', methods=['GET'])
+def liveness_check():
+    """Liveness probe: the process is up and serving HTTP"""
+    return jsonify({'status': 'alive', 'pid': os.getpid()})
+
+@app.route('/health/ready', methods=['GET'])
+def readiness_check():
+    """Readiness probe: LanguageTool is initialized and warmed up"""
+    start_background_init()
+    body = {'ready': is_ready(), 'pid': os.getpid(), **readiness_state()}
+    return jsonify(body), (200 if is_ready() else 503)
 
 @app.route('/health', methods=['GET'])
 def health_check():
     """Health check endpoint"""
+    start_background_init()
+    if not is_ready():
+        return jsonify({
+            'status': 'starting',
+            'service': 'grammar-checker',
+            'pid': os.getpid(),
+            'tool_available': False,
+            'startup': readiness_state()
+        })
+    analyzer = get_analyzer()
     return jsonify({
         'status': 'healthy',
         'service': 'grammar-checker',
-        'tool_available': tool is not None
+        'pid': os.getpid(),
+        'tool_available': analyzer.tool is not None,
+        'startup': readiness_state(),
+        'profiles': list(RULE_PROFILES),
+        'cache': analyzer.cache.get_stats(),
+        'prefilter': analyzer.prefilter.get_stats() if analyzer.prefilter else None,
+        'pool': analyzer.pool.get_stats(),
+        'coalescing': analyzer.inflight.get_stats(),
+        'microbatch': analyzer.batcher.get_stats() if analyzer.batcher else None,
+        'languages': get_registry().get_stats()
     })
 
+def _respond(payload):
+    """Negotiated response for a successful result"""
+    body, headers = encode_response(
+        payload, request.headers.get('Accept', ''), request.headers.get('Accept-Encoding', '')
+    )
+    return Response(body, headers=headers)
+
+def parse_profile(profile, default):
+    """Validate a rule profile name; None means the default"""
+    if profile is None or profile == '':
+        return default
+    if profile not in RULE_PROFILES:
+        raise ValueError(f"Unknown profile: {profile}. Available: {', '.join(RULE_PROFILES)}")
+    return profile
+
+def parse_language(language):
+    """Validate a language code; None means the default"""
+    if language is None or language == '':
+        return DEFAULT_LANGUAGE
+    if language not in SUPPORTED_LANGUAGES:
+        raise ValueError(f"Unsupported language: {language}. Available: {', '.join(SUPPORTED_LANGUAGES)}")
+    return language
+
+def parse_flag(value):
+    """Boolean option from JSON (true/false) or a string such as '1', 'true' or 'false'"""
+    if isinstance(value, str):
+        return value.strip().lower() in ('1', 'true')
+    return bool(value)
+
+def parse_issue_options(data, args):
+    """Issue projection options from the JSON body, falling back to the query string `args`.
+
+    Raises ValueError for unknown fields.
+    """
+    fields = parse_issue_fields(data.get('fields', args.get('fields')))
+    dedupe_messages = parse_flag(data.get('dedupe_messages', args.get('dedupe_messages')))
+    return fields, dedupe_messages
+
+def _issue_options(data):
+    return parse_issue_options(data, request.args)
+
 @app.route('/analyze', methods=['POST'])
 def analyze_essay():
     """Analyze essay for grammar issues"""
@@ -163,13 +1828,156 @@ def analyze_essay():
         if not text.strip():
             return jsonify({'error': 'Text cannot be empty'}), 400
         
+        try:
+            fields, dedupe_messages = _issue_options(data)
+            profile = parse_profile(data.get('profile'), DEFAULT_PROFILE)
+            language = parse_language(data.get('language'))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
         # Analyze the text
-        result = analyzer.analyze_text(text)
+        analyzer = get_analyzer(language)
+        incremental = parse_flag(data.get('incremental', INCREMENTAL_DEFAULT))
+        result = analyzer.analyze_text(
+            text, incremental=incremental, fields=fields, dedupe_messages=dedupe_messages,
+            profile=profile
+        )
         
-        return jsonify(result)
+        return _respond(result)
         
     except Exception as e:
         logger.error(f"Error in analyze endpoint: {e}")
+        _record_error('/analyze', e)
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/analyze/full', methods=['POST'])
+def analyze_full():
+    """Analysis, suggestions and quick-check info from one LanguageTool pass"""
+    try:
+        data = request.get_json()
+        
+        if not data or 'text' not in data:
+            return jsonify({'error': 'Text is required'}), 400
+        
+        text = data['text']
+        
+        if not text.strip():
+            return jsonify({'error': 'Text cannot be empty'}), 400
+        
+        try:
+            fields, dedupe_messages = _issue_options(data)
+            profile = parse_profile(data.get('profile'), DEFAULT_PROFILE)
+            language = parse_language(data.get('language'))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        analyzer = get_analyzer(language)
+        incremental = parse_flag(data.get('incremental', INCREMENTAL_DEFAULT))
+        result = analyzer.analyze_full(
+            text, incremental=incremental, fields=fields, dedupe_messages=dedupe_messages,
+            profile=profile
+        )
+        
+        return _respond(result)
+        
+    except Exception as e:
+        logger.error(f"Error in full analysis endpoint: {e}")
+        _record_error('/analyze/full', e)
+        return jsonify({'error': str(e)}), 500
+
+def _stream_records(records, fmt):
+    """Encode analysis records as NDJSON lines or Server-Sent Events"""
+    try:
+        for record in records:
+            payload = json.dumps(record)
+            if fmt == 'sse':
+                yield f"event: {record['type']}\ndata: {payload}\n\n"
+            else:
+                yield payload + '\n'
+    except Exception as e:
+        logger.error(f"Error while streaming analysis: {e}")
+        _record_error('/analyze/stream body', e)
+        payload = json.dumps({'type': 'error', 'error': str(e)})
+        yield f"event: error\ndata: {payload}\n\n" if fmt == 'sse' else payload + '\n'
+
+@app.route('/analyze/stream', methods=['POST'])
+def analyze_stream():
+    """Stream issues paragraph by paragraph as NDJSON or Server-Sent Events"""
+    try:
+        data = request.get_json()
+        
+        if not data or 'text' not in data:
+            return jsonify({'error': 'Text is required'}), 400
+        
+        text = data['text']
+        
+        if not text.strip():
+            return jsonify({'error': 'Text cannot be empty'}), 400
+        
+        try:
+            fields = parse_issue_fields(data.get('fields', request.args.get('fields')))
+            profile = parse_profile(data.get('profile'), DEFAULT_PROFILE)
+            language = parse_language(data.get('language'))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        analyzer = get_analyzer(language)
+        if not analyzer.tool:
+            return jsonify({'error': 'LanguageTool not available'}), 503
+        
+        # ?format=sse|ndjson, otherwise negotiated from the Accept header
+        fmt = request.args.get('format')
+        if fmt not in ('sse', 'ndjson'):
+            fmt = 'sse' if 'text/event-stream' in request.headers.get('Accept', '') else 'ndjson'
+        mimetype = 'text/event-stream' if fmt == 'sse' else 'application/x-ndjson'
+        
+        body = stream_with_context(_stream_records(analyzer.iter_analysis(text, fields, profile), fmt))
+        return Response(body, mimetype=mimetype, headers={
+            'Cache-Control': 'no-cache',
+            'X-Accel-Buffering': 'no'
+        })
+        
+    except Exception as e:
+        logger.error(f"Error in analyze stream endpoint: {e}")
+        _record_error('/analyze/stream', e)
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/analyze/batch', methods=['POST'])
+def analyze_batch():
+    """Analyze a list of texts in one request"""
+    try:
+        data = request.get_json()
+        
+        if not data or not isinstance(data.get('texts'), list):
+            return jsonify({'error': 'texts must be a list'}), 400
+        
+        texts = data['texts']
+        
+        if len(texts) > BATCH_MAX_ITEMS:
+            return jsonify({'error': f'At most {BATCH_MAX_ITEMS} texts per batch'}), 400
+        
+        try:
+            fields, dedupe_messages = _issue_options(data)
+            profile = parse_profile(data.get('profile'), DEFAULT_PROFILE)
+            language = parse_language(data.get('language'))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        analyzer = get_analyzer(language)
+        if not analyzer.tool:
+            return jsonify({'error': 'LanguageTool not available'}), 503
+        
+        incremental = parse_flag(data.get('incremental', INCREMENTAL_DEFAULT))
+        result = analyzer.analyze_batch(
+            texts, incremental=incremental, fields=fields, dedupe_messages=dedupe_messages,
+            profile=profile
+        )
+        
+        return _respond(result)
+        
+    except Exception as e:
+        logger.error(f"Error in batch analyze endpoint: {e}")
+        _record_error('/analyze/batch', e)
         return jsonify({'error': str(e)}), 500
 
 @app.route('/suggestions', methods=['POST'])
@@ -182,12 +1990,21 @@ def get_suggestions():
             return jsonify({'error': 'Text is required'}), 400
         
         text = data['text']
-        suggestions = analyzer.get_suggestions(text)
         
-        return jsonify({'suggestions': suggestions})
+        try:
+            profile = parse_profile(data.get('profile'), DEFAULT_PROFILE)
+            language = parse_language(data.get('language'))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        incremental = parse_flag(data.get('incremental', INCREMENTAL_DEFAULT))
+        suggestions = get_analyzer(language).get_suggestions(text, incremental=incremental, profile=profile)
+        
+        return _respond({'suggestions': suggestions})
         
     except Exception as e:
         logger.error(f"Error in suggestions endpoint: {e}")
+        _record_error('/suggestions', e)
         return jsonify({'error': str(e)}), 500
 
 @app.route('/check', methods=['POST'])
@@ -201,22 +2018,25 @@ def quick_check():
         
         text = data['text']
         
-        if not self.tool:
-            return jsonify({'error': 'LanguageTool not available'}), 503
+        try:
+            profile = parse_profile(data.get('profile'), CHECK_PROFILE)
+            language = parse_language(data.get('language'))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
-        matches = self.tool.check(text)
+        analyzer = get_analyzer(language)
+        if not analyzer.tool:
+            return jsonify({'error': 'LanguageTool not available'}), 503
         
-        return jsonify({
-            'has_errors': len(matches) > 0,
-            'error_count': len(matches),
-            'score': max(0, 100 - (len(matches) * 5))
-        })
+        return _respond(analyzer.quick_check(text, profile))
         
     except Exception as e:
         logger.error(f"Error in quick check endpoint: {e}")
+        _record_error('/check', e)
         return jsonify({'error': str(e)}), 500
 
 if __name__ == '__main__':
     port = int(sys.argv[1]) if len(sys.argv) > 1 else 5001
     logger.info(f"Starting Grammar Service on port {port}")
+    start_background_init()
     app.run(host='0.0.0.0', port=port, debug=False) 
\ No newline at end of file
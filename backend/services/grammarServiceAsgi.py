@@ -0,0 +1,341 @@
+#!/usr/bin/env python3
+"""
+Async (ASGI) Grammar Service for AdmitAI Korea
+Serves /analyze, /analyze/full, /suggestions and /check with bounded
+concurrency: blocking LanguageTool checks run on a fixed executor, and
+requests beyond the queue depth are rejected immediately with 503 and
+Retry-After
+"""
+
+import asyncio
+import contextlib
+import functools
+import logging
+import math
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+
+from grammarService import (
+    CHECK_PROFILE, DEFAULT_PROFILE, IN_FLIGHT, INCREMENTAL_DEFAULT, REQUEST_LATENCY, REQUESTS,
+    _record_error, encode_response, get_analyzer, get_registry, is_ready, parse_flag,
+    parse_issue_options, parse_language, parse_profile, readiness_state, render_metrics,
+    start_background_init
+)
+
+logger = logging.getLogger(__name__)
+
+# Concurrency configuration
+ASYNC_WORKERS = int(os.environ.get('GRAMMAR_ASYNC_WORKERS', '4'))
+QUEUE_DEPTH = int(os.environ.get('GRAMMAR_QUEUE_DEPTH', '32'))
+QUEUE_TIMEOUT = float(os.environ.get('GRAMMAR_QUEUE_TIMEOUT', '10'))
+
+class Overloaded(Exception):
+    """Raised when a request cannot be admitted or waited too long for a slot"""
+
+    def __init__(self, reason, retry_after):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+class BoundedRunner:
+    """Run blocking calls on a fixed executor behind a bounded wait queue"""
+
+    def __init__(self, workers=ASYNC_WORKERS, queue_depth=QUEUE_DEPTH, queue_timeout=QUEUE_TIMEOUT):
+        self.workers = max(1, workers)
+        self.queue_depth = queue_depth
+        self.queue_timeout = queue_timeout
+        self.executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='grammar')
+        self._slots = None
+        self.waiting = 0
+        self.running = 0
+        self.avg_latency = 0.5
+        self.stats = {
+            'completed': 0,
+            'rejected': 0,
+            'timed_out': 0
+        }
+
+    def retry_after(self):
+        """Seconds until the current backlog should have drained"""
+        backlog = self.waiting + self.running + 1
+        return max(1, math.ceil(backlog * self.avg_latency / self.workers))
+
+    async def run(self, fn, *args):
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.workers)
+
+        if not self._slots.locked():
+            # A worker is free: take it without queueing
+            await self._slots.acquire()
+        else:
+            if self.waiting >= self.queue_depth:
+                self.stats['rejected'] += 1
+                raise Overloaded('Grammar service queue is full', self.retry_after())
+
+            self.waiting += 1
+            try:
+                await asyncio.wait_for(self._slots.acquire(), self.queue_timeout)
+            except asyncio.TimeoutError:
+                self.stats['timed_out'] += 1
+                raise Overloaded('Timed out waiting for a grammar worker', self.retry_after())
+            finally:
+                self.waiting -= 1
+
+        self.running += 1
+        started = time.perf_counter()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self.executor, fn, *args)
+        finally:
+            self.running -= 1
+            self._slots.release()
+            # Exponentially weighted latency for Retry-After estimates
+            self.avg_latency = 0.8 * self.avg_latency + 0.2 * (time.perf_counter() - started)
+            self.stats['completed'] += 1
+
+    def get_stats(self):
+        return {
+            **self.stats,
+            'workers': self.workers,
+            'queue_depth': self.queue_depth,
+            'waiting': self.waiting,
+            'running': self.running,
+            'avg_latency_ms': round(self.avg_latency * 1000, 2)
+        }
+
+runner = BoundedRunner()
+
+def instrumented(route):
+    """Record request count, latency and in-flight gauge for a handler"""
+    def decorator(handler):
+        @functools.wraps(handler)
+        async def wrapper(request):
+            started = time.perf_counter()
+            IN_FLIGHT.labels(route=route).inc()
+            status = 500
+            try:
+                response = await handler(request)
+                status = response.status_code
+                return response
+            finally:
+                IN_FLIGHT.labels(route=route).dec()
+                REQUEST_LATENCY.labels(route=route).observe(time.perf_counter() - started)
+                REQUESTS.labels(route=route, method=request.method, status=str(status)).inc()
+        return wrapper
+    return decorator
+
+def _respond(request, payload):
+    """Negotiated response for a successful result"""
+    body, headers = encode_response(
+        payload, request.headers.get('accept', ''), request.headers.get('accept-encoding', '')
+    )
+    media_type = headers.pop('Content-Type')
+    return Response(body, media_type=media_type, headers=headers)
+
+def _overloaded_response(error):
+    return JSONResponse(
+        {'error': error.reason, 'retry_after': error.retry_after},
+        status_code=503,
+        headers={'Retry-After': str(error.retry_after)}
+    )
+
+async def _read_body(request, allow_empty=True):
+    """Parse and validate the JSON body, returning (data, error response)"""
+    try:
+        data = await request.json()
+    except ValueError:
+        data = None
+
+    if not isinstance(data, dict) or 'text' not in data:
+        return None, JSONResponse({'error': 'Text is required'}, status_code=400)
+
+    if not isinstance(data['text'], str):
+        return None, JSONResponse({'error': 'Text must be a string'}, status_code=400)
+
+    if not allow_empty and not data['text'].strip():
+        return None, JSONResponse({'error': 'Text cannot be empty'}, status_code=400)
+
+    return data, None
+
+async def metrics(request):
+    """Prometheus metrics in text exposition format"""
+    body, content_type = render_metrics()
+    return Response(body, media_type=content_type)
+
+async def liveness_check(request):
+    """Liveness probe: the process is up and serving HTTP"""
+    return JSONResponse({'status': 'alive', 'pid': os.getpid()})
+
+async def readiness_check(request):
+    """Readiness probe: LanguageTool is initialized and warmed up"""
+    start_background_init()
+    body = {'ready': is_ready(), 'pid': os.getpid(), **readiness_state()}
+    return JSONResponse(body, status_code=200 if is_ready() else 503)
+
+async def health_check(request):
+    """Health check endpoint"""
+    start_background_init()
+    return JSONResponse({
+        'status': 'healthy' if is_ready() else 'starting',
+        'service': 'grammar-checker',
+        'mode': 'asgi',
+        'pid': os.getpid(),
+        'tool_available': is_ready() and get_analyzer().tool is not None,
+        'startup': readiness_state(),
+        'languages': get_registry().get_stats() if is_ready() else None,
+        'runner': runner.get_stats()
+    })
+
+@instrumented('/analyze')
+async def analyze_essay(request):
+    """Analyze essay for grammar issues"""
+    data, error = await _read_body(request, allow_empty=False)
+    if error is not None:
+        return error
+
+    text = data['text']
+    incremental = parse_flag(data.get('incremental', INCREMENTAL_DEFAULT))
+    try:
+        fields, dedupe_messages = parse_issue_options(data, request.query_params)
+        profile = parse_profile(data.get('profile'), DEFAULT_PROFILE)
+        language = parse_language(data.get('language'))
+    except ValueError as e:
+        return JSONResponse({'error': str(e)}, status_code=400)
+
+    try:
+        result = await runner.run(
+            lambda: get_analyzer(language).analyze_text(
+                text, incremental=incremental, fields=fields, dedupe_messages=dedupe_messages,
+                profile=profile
+            )
+        )
+        return _respond(request, result)
+    except Overloaded as e:
+        return _overloaded_response(e)
+    except Exception as e:
+        logger.error(f"Error in analyze endpoint: {e}")
+        _record_error('/analyze', e)
+        return JSONResponse({'error': str(e)}, status_code=500)
+
+@instrumented('/analyze/full')
+async def analyze_full(request):
+    """Analysis, suggestions and quick-check info from one LanguageTool pass"""
+    data, error = await _read_body(request, allow_empty=False)
+    if error is not None:
+        return error
+
+    text = data['text']
+    incremental = parse_flag(data.get('incremental', INCREMENTAL_DEFAULT))
+    try:
+        fields, dedupe_messages = parse_issue_options(data, request.query_params)
+        profile = parse_profile(data.get('profile'), DEFAULT_PROFILE)
+        language = parse_language(data.get('language'))
+    except ValueError as e:
+        return JSONResponse({'error': str(e)}, status_code=400)
+
+    try:
+        result = await runner.run(
+            lambda: get_analyzer(language).analyze_full(
+                text, incremental=incremental, fields=fields, dedupe_messages=dedupe_messages,
+                profile=profile
+            )
+        )
+        return _respond(request, result)
+    except Overloaded as e:
+        return _overloaded_response(e)
+    except Exception as e:
+        logger.error(f"Error in full analysis endpoint: {e}")
+        _record_error('/analyze/full', e)
+        return JSONResponse({'error': str(e)}, status_code=500)
+
+@instrumented('/suggestions')
+async def get_suggestions(request):
+    """Get specific suggestions for text improvement"""
+    data, error = await _read_body(request)
+    if error is not None:
+        return error
+
+    text = data['text']
+    incremental = parse_flag(data.get('incremental', INCREMENTAL_DEFAULT))
+    try:
+        profile = parse_profile(data.get('profile'), DEFAULT_PROFILE)
+        language = parse_language(data.get('language'))
+    except ValueError as e:
+        return JSONResponse({'error': str(e)}, status_code=400)
+
+    try:
+        suggestions = await runner.run(
+            lambda: get_analyzer(language).get_suggestions(text, incremental=incremental, profile=profile)
+        )
+        return _respond(request, {'suggestions': suggestions})
+    except Overloaded as e:
+        return _overloaded_response(e)
+    except Exception as e:
+        logger.error(f"Error in suggestions endpoint: {e}")
+        _record_error('/suggestions', e)
+        return JSONResponse({'error': str(e)}, status_code=500)
+
+def _quick_check(text, profile, language):
+    analyzer = get_analyzer(language)
+    if not analyzer.tool:
+        return None
+    return analyzer.quick_check(text, profile)
+
+@instrumented('/check')
+async def quick_check(request):
+    """Quick grammar check with basic info"""
+    data, error = await _read_body(request)
+    if error is not None:
+        return error
+
+    text = data['text']
+    try:
+        profile = parse_profile(data.get('profile'), CHECK_PROFILE)
+        language = parse_language(data.get('language'))
+    except ValueError as e:
+        return JSONResponse({'error': str(e)}, status_code=400)
+
+    try:
+        result = await runner.run(_quick_check, text, profile, language)
+        if result is None:
+            return JSONResponse({'error': 'LanguageTool not available'}, status_code=503)
+        return _respond(request, result)
+    except Overloaded as e:
+        return _overloaded_response(e)
+    except Exception as e:
+        logger.error(f"Error in quick check endpoint: {e}")
+        _record_error('/check', e)
+        return JSONResponse({'error': str(e)}, status_code=500)
+
+@contextlib.asynccontextmanager
+async def lifespan(app):
+    start_background_init()
+    yield
+
+app = Starlette(
+    lifespan=lifespan,
+    routes=[
+        Route('/health', health_check, methods=['GET']),
+        Route('/health/live', liveness_check, methods=['GET']),
+        Route('/health/ready', readiness_check, methods=['GET']),
+        Route('/metrics', metrics, methods=['GET']),
+        Route('/analyze', analyze_essay, methods=['POST']),
+        Route('/analyze/full', analyze_full, methods=['POST']),
+        Route('/suggestions', get_suggestions, methods=['POST']),
+        Route('/check', quick_check, methods=['POST'])
+    ],
+    middleware=[Middleware(CORSMiddleware, allow_origins=['*'], allow_methods=['*'], allow_headers=['*'])]
+)
+
+if __name__ == '__main__':
+    import uvicorn
+
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 5001
+    logger.info(f"Starting async Grammar Service on port {port}")
+    uvicorn.run(app, host='0.0.0.0', port=port)
@@ -0,0 +1,85 @@
+"""
+Gunicorn configuration for the production Grammar Service
+Pre-forks worker processes that each start and warm up their own LanguageTool
+before accepting requests
+"""
+
+import multiprocessing
+import os
+
+from processMemory import child_pids, rss_mb
+
+# Server socket
+bind = f"0.0.0.0:{os.environ.get('GRAMMAR_PORT', '5001')}"
+
+# Workers: one process per core by default, each with a few threads that
+# share the worker's analyzer and LanguageTool pool
+workers = int(os.environ.get('GRAMMAR_WORKERS', multiprocessing.cpu_count()))
+worker_class = 'gthread'
+threads = int(os.environ.get('GRAMMAR_THREADS', '4'))
+
+# Every worker must start its own LanguageTool server, so the app is not
+# preloaded in the master
+preload_app = False
+
+# Each worker starts and warms up LanguageTool before it accepts requests;
+# the timeout must cover that, or the arbiter kills the booting worker
+timeout = int(os.environ.get('GRAMMAR_WORKER_TIMEOUT', '120'))
+graceful_timeout = int(os.environ.get('GRAMMAR_GRACEFUL_TIMEOUT', '30'))
+
+# Recycling: after a number of requests, or once a worker (including its
+# LanguageTool server) grows past a memory limit. 0 disables either check.
+max_requests = int(os.environ.get('GRAMMAR_MAX_REQUESTS', '0'))
+max_requests_jitter = int(os.environ.get('GRAMMAR_MAX_REQUESTS_JITTER', '50'))
+max_worker_memory_mb = int(os.environ.get('GRAMMAR_MAX_WORKER_MEMORY_MB', '0'))
+
+accesslog = '-'
+errorlog = '-'
+loglevel = os.environ.get('GRAMMAR_LOG_LEVEL', 'info')
+
+
+def worker_memory_mb(pid):
+    """Memory of a worker plus its LanguageTool (JVM) child processes"""
+    return rss_mb(pid) + sum(rss_mb(child) for child in child_pids(pid))
+
+
+def post_worker_init(worker):
+    """Start and warm up LanguageTool before the worker accepts requests"""
+    from grammarService import initialize, readiness_state
+    if initialize():
+        state = readiness_state()
+        worker.log.info(
+            f"Worker {worker.pid} ready (init {state.get('init_seconds')}s, "
+            f"warm-up {state.get('warmup_seconds')}s)"
+        )
+    else:
+        # Serve anyway: /health/ready reports the failure and requests retry startup
+        worker.log.error(f"Worker {worker.pid} started without LanguageTool: {readiness_state().get('error')}")
+
+
+def post_request(worker, req, environ, resp):
+    """Gracefully retire a worker once it has grown past the memory limit"""
+    if not max_worker_memory_mb or not worker.alive:
+        return
+    used = worker_memory_mb(worker.pid)
+    if used > max_worker_memory_mb:
+        worker.log.info(
+            f"Worker {worker.pid} uses {used:.0f} MB (limit {max_worker_memory_mb} MB), recycling"
+        )
+        worker.alive = False
+
+
+def child_exit(server, worker):
+    """Drop live gauges of a dead worker from the multiprocess metrics"""
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
+
+
+def worker_exit(server, worker):
+    """Stop the worker's LanguageTool servers so they do not outlive it"""
+    try:
+        from grammarService import shutdown_analyzer
+        shutdown_analyzer()
+    except Exception as e:
+        worker.log.error(f"Failed to shut down analyzer: {e}")
@@ -0,0 +1,31 @@
+"""
+Process memory helpers for the Grammar Service
+Shared by the language registry (LanguageTool server memory) and the gunicorn
+config (worker recycling); read from /proc, so they report 0 where it is absent
+"""
+
+import os
+
+
+def rss_mb(pid):
+    """Resident memory of a process in MB, read from /proc (0 where unavailable)"""
+    try:
+        with open(f'/proc/{pid}/status') as status:
+            for line in status:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return 0.0
+
+
+def child_pids(pid):
+    """Direct child processes of a process, e.g. a worker's LanguageTool servers"""
+    pids = []
+    try:
+        for task in os.listdir(f'/proc/{pid}/task'):
+            with open(f'/proc/{pid}/task/{task}/children') as children:
+                pids.extend(int(child) for child in children.read().split())
+    except OSError:
+        pass
+    return pids
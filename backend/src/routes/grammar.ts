@@ -17,7 +17,8 @@ router.post('/analyze', async (req, res) => {
     if (!text || typeof text !== 'string' || text.trim().length === 0) {
       return res.status(400).json({ success: false, message: 'text is required' });
     }
-    const analysis = await grammarService.analyzeEssay(text);
+    // One grammar-service pass returns the analysis together with its suggestions
+    const analysis = await grammarService.analyzeFull(text);
     return res.json({ success: true, data: analysis });
   } catch (error) {
     return res.status(500).json({ success: false, message: 'Failed to analyze text' });
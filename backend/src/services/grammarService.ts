@@ -27,6 +27,11 @@ interface GrammarSuggestion {
   category: string;
 }
 
+interface GrammarFullAnalysis extends GrammarAnalysis {
+  suggestions: GrammarSuggestion[];
+  has_errors: boolean;
+}
+
 export class GrammarService {
   private baseUrl: string;
   private isAvailable: boolean = false;
@@ -41,6 +46,10 @@ export class GrammarService {
       const response = await axios.get(`${this.baseUrl}/health`);
       this.isAvailable = response.data.tool_available;
       logger.info(`Grammar service health check: ${response.data.status}`);
+      if (response.data.status === 'starting') {
+        // LanguageTool is still warming up; check again shortly
+        setTimeout(() => this.checkHealth(), 5000).unref();
+      }
     } catch (_error) {
       logger.warn('Grammar service not available, falling back to basic analysis');
       this.isAvailable = false;
@@ -69,6 +78,21 @@ export class GrammarService {
     }
   }
 
+  async analyzeFull(text: string): Promise<GrammarFullAnalysis> {
+    if (!this.isAvailable) {
+      const analysis = this.fallbackAnalysis(text);
+      return { ...analysis, suggestions: [], has_errors: analysis.total_errors > 0 };
+    }
+    try {
+      const response = await axios.post(`${this.baseUrl}/analyze/full`, { text });
+      return response.data;
+    } catch (error) {
+      logger.error('Error calling grammar service full analysis:', error);
+      const analysis = this.fallbackAnalysis(text);
+      return { ...analysis, suggestions: [], has_errors: analysis.total_errors > 0 };
+    }
+  }
+
   async quickCheck(text: string): Promise<{ has_errors: boolean; error_count: number; score: number; }> {
     if (!this.isAvailable) return this.fallbackQuickCheck(text);
     try {
@@ -1,8 +1,15 @@
 #!/bin/bash
 
 # Start Grammar Service for AdmitAI Korea
+#   ./start-grammar-service.sh [port]
+# GRAMMAR_SERVICE_MODE=production (default) runs pre-forked gunicorn workers,
+# GRAMMAR_SERVICE_MODE=async runs the ASGI app under uvicorn with load shedding,
+# GRAMMAR_SERVICE_MODE=development runs the single-process Flask server.
 echo "🚀 Starting LanguageTool Grammar Service..."
 
+PORT="${1:-5001}"
+MODE="${GRAMMAR_SERVICE_MODE:-production}"
+
 # Check if Python 3 is available
 if ! command -v python3 &> /dev/null; then
     echo "❌ Python 3 is not installed. Please install Python 3.8+"
@@ -11,12 +18,27 @@ fi
 
 # Check if required packages are installed
 echo "📦 Checking Python dependencies..."
-python3 -c "import flask, language_tool_python" 2>/dev/null
+python3 -c "import flask, language_tool_python, gunicorn, starlette, uvicorn" 2>/dev/null
 if [ $? -ne 0 ]; then
     echo "📦 Installing required packages..."
     pip3 install -r requirements.txt
 fi
 
 # Start the grammar service
-echo "🔧 Starting grammar service on port 5001..."
-python3 services/grammarService.py 5001 
\ No newline at end of file
+if [ "$MODE" = "development" ]; then
+    echo "🔧 Starting grammar service (development) on port $PORT..."
+    python3 services/grammarService.py "$PORT"
+elif [ "$MODE" = "async" ]; then
+    echo "🔧 Starting grammar service (async, ${GRAMMAR_WORKERS:-1} workers) on port $PORT..."
+    if [ "${GRAMMAR_WORKERS:-1}" -gt 1 ]; then
+        export PROMETHEUS_MULTIPROC_DIR="${PROMETHEUS_MULTIPROC_DIR:-$(mktemp -d -t grammar-metrics.XXXXXX)}"
+        rm -rf "${PROMETHEUS_MULTIPROC_DIR:?}"/*
+    fi
+    cd services && exec python3 -m uvicorn grammarServiceAsgi:app --host 0.0.0.0 --port "$PORT" --workers "${GRAMMAR_WORKERS:-1}"
+else
+    echo "🔧 Starting grammar service (production, ${GRAMMAR_WORKERS:-all cores} workers) on port $PORT..."
+    # Shared directory so /metrics aggregates all workers
+    export PROMETHEUS_MULTIPROC_DIR="${PROMETHEUS_MULTIPROC_DIR:-$(mktemp -d -t grammar-metrics.XXXXXX)}"
+    rm -rf "${PROMETHEUS_MULTIPROC_DIR:?}"/*
+    cd services && GRAMMAR_PORT="$PORT" exec python3 -m gunicorn -c gunicorn.conf.py grammarService:app
+fi
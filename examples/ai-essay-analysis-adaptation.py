@@ -5,13 +5,34 @@
 # for our Korean student-focused essay analysis system
 
 import openai
+import argparse
+import asyncio
+import contextlib
+import csv
+import hashlib
+import itertools
 import json
+import math
+import os
+import random
 import re
-from typing import Dict, List, Any, Optional
+import sqlite3
+import sys
+import threading
+import time
+import numpy as np
+from collections import OrderedDict, deque
+from typing import Dict, List, Any, Optional, Iterable, Iterator, AsyncIterator, Tuple, Callable
 from dataclasses import dataclass
 from enum import Enum
 import logging
 
+# Exact GPT token counts when tiktoken is installed; otherwise an estimate
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -71,6 +92,7 @@ class EssayAnalysis:
     summary: str
     recommendations: List[str]
     cultural_context: Dict[str, Any]
+    prompt_stats: Optional[Dict[str, Any]] = None
 
 # =============================================================================
 # BEFORE: Original SpaCy-based Analysis (from Automated Essay Grading)
@@ -79,27 +101,65 @@ class EssayAnalysis:
 class OriginalEssayGrader:
     """Original SpaCy-based essay grader from the repository"""
     
+    # The features need tags, POS and the parse (sentences, noun chunks) only
+    UNUSED_PIPES = ("ner", "lemmatizer", "textcat")
+    
     def __init__(self):
         import spacy
         self.nlp = spacy.load("en_core_web_sm")
     
     def extract_features(self, essay_text: str) -> Dict[str, Any]:
         """Extract basic NLP features using SpaCy"""
-        doc = self.nlp(essay_text)
-        
-        features = {
-            'word_count': len(doc),
-            'sentence_count': len(list(doc.sents)),
-            'avg_sentence_length': len(doc) / len(list(doc.sents)),
-            'unique_words': len(set([token.text.lower() for token in doc if not token.is_punct])),
-            'vocabulary_diversity': len(set([token.text.lower() for token in doc if not token.is_punct])) / len(doc),
-            'noun_phrases': len(list(doc.noun_chunks)),
-            'verb_phrases': len([token for token in doc if token.pos_ == 'VERB']),
-            'adjective_count': len([token for token in doc if token.pos_ == 'ADJ']),
-            'adverb_count': len([token for token in doc if token.pos_ == 'ADV']),
-        }
+        with self.nlp.select_pipes(disable=self._unused_pipes()):
+            doc = self.nlp(essay_text)
+        return self._features_from_doc(doc)
+    
+    def extract_features_batch(self, essay_texts: Iterable[str], batch_size: int = 64,
+                               n_process: int = 1) -> Iterator[Dict[str, Any]]:
+        """Extract features for many essays, in input order, with nlp.pipe
         
-        return features
+        Essays are parsed lazily in batches, so a large corpus can be streamed
+        through without holding every Doc in memory. n_process > 1 parses in
+        worker processes.
+        """
+        docs = self.nlp.pipe(
+            essay_texts,
+            batch_size=batch_size,
+            n_process=n_process,
+            disable=self._unused_pipes()
+        )
+        for doc in docs:
+            yield self._features_from_doc(doc)
+    
+    def _unused_pipes(self) -> List[str]:
+        return [name for name in self.UNUSED_PIPES if name in self.nlp.pipe_names]
+    
+    def _features_from_doc(self, doc) -> Dict[str, Any]:
+        """All features from a single pass over the tokens"""
+        word_count = len(doc)
+        sentence_count = 0
+        unique_words = set()
+        pos_counts = {'VERB': 0, 'ADJ': 0, 'ADV': 0}
+        
+        for token in doc:
+            if token.is_sent_start or token.i == 0:
+                sentence_count += 1
+            if not token.is_punct:
+                unique_words.add(token.lower_)
+            if token.pos_ in pos_counts:
+                pos_counts[token.pos_] += 1
+        
+        return {
+            'word_count': word_count,
+            'sentence_count': sentence_count,
+            'avg_sentence_length': word_count / sentence_count if sentence_count else 0.0,
+            'unique_words': len(unique_words),
+            'vocabulary_diversity': len(unique_words) / word_count if word_count else 0.0,
+            'noun_phrases': sum(1 for _ in doc.noun_chunks),
+            'verb_phrases': pos_counts['VERB'],
+            'adjective_count': pos_counts['ADJ'],
+            'adverb_count': pos_counts['ADV'],
+        }
     
     def grade_essay(self, features: Dict[str, Any]) -> float:
         """Simple grading based on extracted features"""
@@ -131,90 +191,203 @@ class OriginalEssayGrader:
             score += 1.5
         
         return min(score, 10.0)
+    
+    # Feature matrix columns used by grade_batch
+    GRADE_FEATURES = ('vocabulary_diversity', 'avg_sentence_length', 'noun_phrases',
+                      'verb_phrases', 'word_count')
+    
+    def features_to_matrix(self, features: Iterable[Dict[str, Any]]) -> np.ndarray:
+        """Stack feature dicts into an (essays x GRADE_FEATURES) float matrix"""
+        rows = [[f[name] for name in self.GRADE_FEATURES] for f in features]
+        return np.array(rows, dtype=float).reshape(-1, len(self.GRADE_FEATURES))
+    
+    def grade_batch(self, feature_matrix: np.ndarray) -> np.ndarray:
+        """Vectorized grade_essay: same thresholds and weights, one score per row"""
+        diversity, sentence_length, noun_phrases, verb_phrases, word_count = feature_matrix.T
+        
+        # Vocabulary diversity (30% weight)
+        score = np.select([diversity > 0.7, diversity > 0.5], [3.0, 2.0], 1.0)
+        
+        # Sentence variety (25% weight)
+        score += np.select(
+            [(sentence_length >= 10) & (sentence_length <= 25),
+             (sentence_length >= 5) & (sentence_length <= 30)],
+            [2.5, 1.5], 0.5
+        )
+        
+        # Content richness (45% weight); empty essays count as no content
+        with np.errstate(divide='ignore', invalid='ignore'):
+            content_score = np.where(word_count > 0, (noun_phrases + verb_phrases) / word_count, 0.0)
+        score += np.select([content_score > 0.3, content_score > 0.2], [4.5, 3.0], 1.5)
+        
+        return np.minimum(score, 10.0)
 
 # =============================================================================
-# AFTER: Adapted GPT-4-based Analysis for Korean Students
+# LLM Response Cache
 # =============================================================================
 
-class AdmitAIKoreaEssayAnalyzer:
-    """Enhanced essay analyzer with GPT-4 and Korean cultural context"""
+class LLMResponseCache:
+    """Two-tier cache of LLM completions: in-process LRU plus optional SQLite
     
-    def __init__(self, openai_api_key: str):
-        openai.api_key = openai_api_key
-        self.korean_cultural_context = self._load_korean_context()
-        self.school_profiles = self._load_school_profiles()
+    Keys hash the model, the request parameters and the messages, so an
+    unchanged essay, type, school and language is answered without an API
+    call. Every entry is tagged with a version (a fingerprint of the prompt
+    template and the data it embeds); set_version drops entries written under
+    any other version.
+    """
     
-    def _load_korean_context(self) -> Dict[str, Any]:
-        """Load Korean cultural context for better analysis"""
-        return {
-            "cultural_values": [
-                "Confucian values (respect for elders, education, harmony)",
-                "Collectivism vs individualism",
-                "Academic achievement pressure",
-                "Family expectations and filial piety",
-                "Korean work ethic and diligence",
-                "Cultural humility and modesty"
-            ],
-            "common_esl_patterns": [
-                "Article usage (a/an/the)",
-                "Preposition confusion",
-                "Verb tense consistency",
-                "Subject-verb agreement",
-                "Word order differences",
-                "Formal vs informal register"
-            ],
-            "cultural_translation_challenges": [
-                "Direct translation from Korean",
-                "Cultural concept explanation",
-                "Honorific system adaptation",
-                "Indirect communication style",
-                "Group-oriented thinking"
-            ]
-        }
+    def __init__(self, max_size: int = 256, ttl: float = 7 * 24 * 3600,
+                 db_path: Optional[str] = os.environ.get('ESSAY_LLM_CACHE_DB'),
+                 db_max_rows: int = 20000):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.db_path = db_path
+        self.db_max_rows = db_max_rows
+        self.version = ''
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._writes = 0
+        self.stats = {'hits': 0, 'disk_hits': 0, 'misses': 0, 'evictions': 0}
+        if self.db_path:
+            try:
+                self._db().execute(
+                    'CREATE TABLE IF NOT EXISTS llm_cache (key TEXT PRIMARY KEY, value TEXT NOT NULL, '
+                    'version TEXT NOT NULL, created REAL NOT NULL)'
+                )
+                self._db().commit()
+            except sqlite3.Error as e:
+                logger.error(f"Failed to open LLM response cache: {str(e)}")
+                self.db_path = None
     
-    def _load_school_profiles(self) -> Dict[str, Dict[str, Any]]:
-        """Load target school profiles for better analysis"""
-        return {
-            "stanford": {
-                "name": "Stanford University",
-                "values": ["innovation", "entrepreneurship", "intellectual vitality", "diversity"],
-                "essay_preferences": ["personal stories", "intellectual curiosity", "leadership", "community impact"],
-                "cultural_fit": ["global perspective", "collaboration", "risk-taking"]
-            },
-            "harvard": {
-                "name": "Harvard University",
-                "values": ["leadership", "academic excellence", "service", "character"],
-                "essay_preferences": ["leadership examples", "intellectual growth", "service to others", "personal values"],
-                "cultural_fit": ["global citizenship", "ethical leadership", "intellectual rigor"]
-            },
-            "mit": {
-                "name": "MIT",
-                "values": ["innovation", "problem-solving", "collaboration", "hands-on learning"],
-                "essay_preferences": ["technical interests", "problem-solving examples", "collaboration", "practical applications"],
-                "cultural_fit": ["technical curiosity", "teamwork", "practical innovation"]
-            }
-        }
+    @staticmethod
+    def make_key(model: str, params: Dict[str, Any], messages: List[Dict[str, str]]) -> str:
+        """Stable hash of everything that determines the completion"""
+        payload = json.dumps({'model': model, 'params': params, 'messages': messages},
+                             sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
     
-    def create_cultural_prompt(self, essay_text: str, essay_type: EssayType, 
-                             target_school: Optional[str] = None, 
-                             user_language: str = "ko") -> str:
-        """Create a culturally-aware prompt for GPT-4 analysis"""
+    def _db(self) -> sqlite3.Connection:
+        """This thread's SQLite connection (connections are not shared)"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=5)
+            conn.execute('PRAGMA journal_mode=WAL')
+            self._local.conn = conn
+        return conn
+    
+    def set_version(self, version: str) -> None:
+        """Switch to a new prompt/data version, discarding entries of other versions"""
+        with self._lock:
+            if version != self.version:
+                self._entries.clear()
+            self.version = version
+        if self.db_path:
+            try:
+                conn = self._db()
+                deleted = conn.execute('DELETE FROM llm_cache WHERE version != ?', (version,)).rowcount
+                conn.commit()
+                if deleted:
+                    logger.info(f"Invalidated {deleted} cached LLM responses from older prompt versions")
+            except sqlite3.Error as e:
+                logger.error(f"LLM response cache invalidation failed: {str(e)}")
+    
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and now - entry[0] <= self.ttl:
+                self._entries.move_to_end(key)
+                self.stats['hits'] += 1
+                return entry[1]
+        
+        if self.db_path:
+            try:
+                row = self._db().execute(
+                    'SELECT value, created FROM llm_cache WHERE key = ? AND version = ?',
+                    (key, self.version)
+                ).fetchone()
+            except sqlite3.Error as e:
+                logger.error(f"LLM response cache read failed: {str(e)}")
+                row = None
+            if row is not None and now - row[1] <= self.ttl:
+                self._remember(key, row[0], row[1])
+                with self._lock:
+                    self.stats['disk_hits'] += 1
+                return row[0]
         
-        school_context = ""
-        if target_school and target_school.lower() in self.school_profiles:
-            school = self.school_profiles[target_school.lower()]
-            school_context = f"""
+        with self._lock:
+            self.stats['misses'] += 1
+        return None
+    
+    def set(self, key: str, value: str) -> None:
+        now = time.time()
+        self._remember(key, value, now)
+        if self.db_path:
+            try:
+                conn = self._db()
+                conn.execute(
+                    'INSERT OR REPLACE INTO llm_cache (key, value, version, created) VALUES (?, ?, ?, ?)',
+                    (key, value, self.version, now)
+                )
+                self._writes += 1
+                if self._writes % 50 == 0:
+                    # Drop expired rows and keep the table within its row limit
+                    conn.execute('DELETE FROM llm_cache WHERE created < ?', (now - self.ttl,))
+                    conn.execute(
+                        'DELETE FROM llm_cache WHERE key IN ('
+                        'SELECT key FROM llm_cache ORDER BY created DESC LIMIT -1 OFFSET ?)',
+                        (self.db_max_rows,)
+                    )
+                conn.commit()
+            except sqlite3.Error as e:
+                logger.error(f"LLM response cache write failed: {str(e)}")
+    
+    def _remember(self, key: str, value: str, created: float) -> None:
+        with self._lock:
+            self._entries[key] = (created, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.stats['evictions'] += 1
+    
+    def clear(self) -> None:
+        """Drop every entry from both tiers"""
+        with self._lock:
+            self._entries.clear()
+        if self.db_path:
+            try:
+                conn = self._db()
+                conn.execute('DELETE FROM llm_cache')
+                conn.commit()
+            except sqlite3.Error as e:
+                logger.error(f"LLM response cache clear failed: {str(e)}")
+    
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {**self.stats, 'size': len(self._entries), 'version': self.version,
+                    'disk_enabled': bool(self.db_path)}
+
+# =============================================================================
+# Prompt Building
+# =============================================================================
+
+def format_school_context(school: Dict[str, Any]) -> str:
+    """School section of the analysis prompt"""
+    return f"""
             Target School: {school['name']}
             School Values: {', '.join(school['values'])}
             Essay Preferences: {', '.join(school['essay_preferences'])}
             Cultural Fit Factors: {', '.join(school['cultural_fit'])}
             """
-        
-        prompt = f"""
+
+def render_analysis_prompt(essay_type: str, user_language: str, school_context: str, essay_text: str) -> str:
+    """The analysis prompt; PromptBuilder compiles its static parts once"""
+    return f"""
         You are an expert college admissions essay analyst specializing in Korean students applying to U.S. universities. 
         Analyze the following essay with cultural sensitivity and provide detailed feedback.
 
-        ESSAY TYPE: {essay_type.value}
+        ESSAY TYPE: {essay_type}
         TARGET LANGUAGE: {user_language}
         {school_context}
 
@@ -287,8 +460,361 @@ class AdmitAIKoreaEssayAnalyzer:
             }}
         }}
         """
+
+def render_judgement_prompt(essay_type: str, user_language: str, school_context: str, essay_text: str,
+                            local_facts: str) -> str:
+    """Prompt of the hybrid pipeline: the model judges only what local tools cannot measure"""
+    return f"""
+        You are an expert college admissions essay analyst specializing in Korean students applying to U.S. universities. 
+        Grammar, length, readability, style and structure have already been measured by local tools.
+        Do not re-assess them; judge only content, cultural adaptation and school fit.
+
+        ESSAY TYPE: {essay_type}
+        TARGET LANGUAGE: {user_language}
+        {school_context}
+
+        ESSAY TEXT:
+        {essay_text}
+
+        LOCAL ANALYSIS:
+        {local_facts}
+
+        Please assess (1-10 scale):
+        - Content and substance: specificity, insight, impact
+        - Cultural adaptation: how Korean cultural values are presented, cultural bridge-building, authenticity and cultural humility
+        - School fit (if target school provided): alignment with school values
+
+        Give at most 5 feedback items of type content, cultural or school-fit, and 3-5 recommendations in priority order.
+
+        Format your response as JSON with the following structure:
+        {{
+            "analytics": {{
+                "content_score": float,
+                "cultural_score": float,
+                "school_fit_score": float,
+                "cultural_insights": [string]
+            }},
+            "feedback": [
+                {{
+                    "type": "content|cultural|school-fit",
+                    "severity": "low|medium|high",
+                    "title": string,
+                    "description": string,
+                    "suggestion": string,
+                    "line_number": int
+                }}
+            ],
+            "summary": string,
+            "recommendations": [string],
+            "cultural_context": {{
+                "korean_values_present": [string],
+                "cultural_bridge_opportunities": [string],
+                "esl_improvements": [string]
+            }}
+        }}
+        """
+
+class PromptTooLong(ValueError):
+    """The essay does not fit the prompt budget and the policy is 'error'"""
+
+@dataclass
+class BuiltPrompt:
+    prompts: List[str]
+    stats: Dict[str, Any]
+
+class PromptBuilder:
+    """Builds analysis prompts within a token budget
+    
+    The static instruction segments and every school context are rendered and
+    measured once. Per request only the essay and a few short fields are
+    measured. `template` takes (essay_type, user_language, school_context,
+    essay_text, *extra) and must place them in that order. Essays that do
+    not fit are handled by a policy:
+    
+    - trim:     keep opening and closing sentences, drop the middle
+    - truncate: keep leading sentences only
+    - chunk:    split into paragraph-aligned parts, one prompt each
+    - error:    raise PromptTooLong
+    """
+    
+    POLICIES = ('trim', 'truncate', 'chunk', 'error')
+    SENTENCE_RE = re.compile(r'(?<=[.!?])\s+')
+    # Per-message framing tokens of the chat format
+    MESSAGE_OVERHEAD = 8
+    
+    def __init__(self, school_profiles: Dict[str, Dict[str, Any]], system_prompt: str = "",
+                 model: str = "gpt-4",
+                 context_window: int = int(os.environ.get('ESSAY_CONTEXT_WINDOW', '8192')),
+                 completion_tokens: int = 2000,
+                 policy: str = os.environ.get('ESSAY_PROMPT_POLICY', 'trim'),
+                 template: Callable[..., str] = render_analysis_prompt):
+        if policy not in self.POLICIES:
+            raise ValueError(f"Unknown prompt policy: {policy}")
+        self.model = model
+        self.policy = policy
+        self._encoding = None
+        if tiktoken is not None:
+            try:
+                try:
+                    self._encoding = tiktoken.encoding_for_model(model)
+                except KeyError:
+                    self._encoding = tiktoken.get_encoding("cl100k_base")
+            except Exception as e:
+                # The BPE files are downloaded on first use; offline, fall back to the estimate
+                logger.warning(f"tiktoken encoding unavailable, estimating token counts: {str(e)}")
         
-        return prompt
+        # Split the rendered template at placeholder slots into static segments
+        slots = [f"\x00slot{index}\x00" for index in range(template.__code__.co_argcount)]
+        self._segments = re.split(r'\x00slot\d\x00', template(*slots))
+        self._static_tokens = sum(self.count_tokens(segment) for segment in self._segments)
+        self._school_contexts = {
+            key: (context, self.count_tokens(context))
+            for key, context in ((key, format_school_context(school)) for key, school in school_profiles.items())
+        }
+        
+        self.prompt_budget = (context_window - completion_tokens
+                              - self.count_tokens(system_prompt) - 2 * self.MESSAGE_OVERHEAD)
+    
+    @property
+    def tokenizer(self) -> str:
+        return self._encoding.name if self._encoding is not None else 'estimate'
+    
+    def count_tokens(self, text: str) -> int:
+        if self._encoding is not None:
+            return len(self._encoding.encode(text, disallowed_special=()))
+        # About four characters per token for English, one per token for Hangul
+        ascii_chars = sum(1 for c in text if ord(c) < 128)
+        return math.ceil(ascii_chars / 4) + (len(text) - ascii_chars)
+    
+    def render(self, essay_text: str, essay_type: EssayType, target_school: Optional[str] = None,
+               user_language: str = "ko", extra: Tuple[str, ...] = ()) -> str:
+        school_context = self._school_context(target_school)[0]
+        return self._join(essay_type.value, user_language, school_context, essay_text, *extra)
+    
+    def _join(self, *values: str) -> str:
+        parts = [self._segments[0]]
+        for value, segment in zip(values, self._segments[1:]):
+            parts += [value, segment]
+        return ''.join(parts)
+    
+    def _school_context(self, target_school: Optional[str]) -> tuple:
+        if target_school:
+            return self._school_contexts.get(target_school.lower(), ("", 0))
+        return "", 0
+    
+    def build(self, essay_text: str, essay_type: EssayType, target_school: Optional[str] = None,
+              user_language: str = "ko", policy: Optional[str] = None,
+              extra: Tuple[str, ...] = ()) -> BuiltPrompt:
+        """Prompt(s) for an essay plus size stats for this request"""
+        started = time.perf_counter()
+        policy = policy or self.policy
+        school_context, school_tokens = self._school_context(target_school)
+        fixed_tokens = (self._static_tokens + school_tokens
+                        + self.count_tokens(essay_type.value) + self.count_tokens(user_language)
+                        + sum(self.count_tokens(value) for value in extra))
+        essay_budget = self.prompt_budget - fixed_tokens
+        essay_tokens = self.count_tokens(essay_text)
+        
+        applied = None
+        omitted = 0
+        essays = [essay_text]
+        if essay_tokens > essay_budget:
+            if policy == 'error':
+                raise PromptTooLong(f"Essay needs {essay_tokens} tokens; {essay_budget} available")
+            applied = policy
+            if policy == 'chunk':
+                essays = self._chunk(essay_text, essay_budget)
+            else:
+                essay, omitted = self._shorten(essay_text, essay_budget, keep_tail=policy == 'trim')
+                essays = [essay]
+        
+        prompts = [self._join(essay_type.value, user_language, school_context, essay, *extra) for essay in essays]
+        prompt_tokens = [fixed_tokens + self.count_tokens(essay) for essay in essays]
+        return BuiltPrompt(prompts, {
+            'tokenizer': self.tokenizer,
+            'prompt_tokens': sum(prompt_tokens),
+            'max_prompt_tokens': max(prompt_tokens),
+            'static_tokens': fixed_tokens,
+            'essay_tokens': essay_tokens,
+            'budget_tokens': self.prompt_budget,
+            'policy': applied,
+            'omitted_sentences': omitted,
+            'chunks': len(prompts),
+            'build_ms': round((time.perf_counter() - started) * 1000, 2)
+        })
+    
+    def _shorten(self, essay_text: str, budget: int, keep_tail: bool) -> tuple:
+        """Drop sentences until the essay fits; returns (text, sentences omitted)"""
+        sentences = self.SENTENCE_RE.split(essay_text.strip())
+        marker_tokens = self.count_tokens("[... 000 sentences omitted for length ...]") + 2
+        available = budget - marker_tokens
+        # Openings and conclusions carry the most weight, so 'trim' keeps a third for the end
+        head_budget = available * 2 // 3 if keep_tail else available
+        
+        head, used = [], 0
+        for sentence in sentences:
+            cost = self.count_tokens(sentence) + 1
+            if used + cost > head_budget:
+                break
+            head.append(sentence)
+            used += cost
+        
+        tail = []
+        if keep_tail:
+            for sentence in reversed(sentences[len(head):]):
+                cost = self.count_tokens(sentence) + 1
+                if used + cost > available:
+                    break
+                tail.insert(0, sentence)
+                used += cost
+        
+        omitted = len(sentences) - len(head) - len(tail)
+        marker = f"[... {omitted} sentences omitted for length ...]"
+        return ' '.join(head + [marker] + tail), omitted
+    
+    def _chunk(self, essay_text: str, budget: int) -> List[str]:
+        """Paragraph-aligned parts that each fit the budget (long paragraphs split by sentence)"""
+        label_tokens = self.count_tokens("[Part 00 of 00]\n")
+        available = budget - label_tokens
+        units = []
+        for paragraph in re.split(r'\n\s*\n', essay_text.strip()):
+            if self.count_tokens(paragraph) <= available:
+                units.append(paragraph)
+            else:
+                units.extend(self.SENTENCE_RE.split(paragraph.strip()))
+        
+        chunks, current, used = [], [], 0
+        for unit in units:
+            cost = self.count_tokens(unit) + 1
+            if current and used + cost > available:
+                chunks.append('\n\n'.join(current))
+                current, used = [], 0
+            current.append(unit)
+            used += cost
+        if current:
+            chunks.append('\n\n'.join(current))
+        return [f"[Part {index + 1} of {len(chunks)}]\n{chunk}" for index, chunk in enumerate(chunks)]
+
+# =============================================================================
+# AFTER: Adapted GPT-4-based Analysis for Korean Students
+# =============================================================================
+
+class AdmitAIKoreaEssayAnalyzer:
+    """Enhanced essay analyzer with GPT-4 and Korean cultural context"""
+    
+    # Bump whenever the prompts in render_analysis_prompt, render_judgement_prompt
+    # or generate_cultural_insights change, so cached responses are discarded
+    PROMPT_TEMPLATE_VERSION = "1"
+    
+    ANALYSIS_SYSTEM_PROMPT = "You are an expert college admissions essay analyst with deep understanding of Korean culture and U.S. college admissions."
+    INSIGHTS_SYSTEM_PROMPT = "You are a cultural bridge expert specializing in Korean-American cultural exchange."
+    
+    def __init__(self, openai_api_key: str, response_cache: Optional[LLMResponseCache] = None):
+        openai.api_key = openai_api_key
+        self.korean_cultural_context = self._load_korean_context()
+        self.school_profiles = self._load_school_profiles()
+        self.response_cache = response_cache if response_cache is not None else LLMResponseCache()
+        self.response_cache.set_version(self.prompt_fingerprint())
+        self.prompt_builder = PromptBuilder(self.school_profiles, system_prompt=self.ANALYSIS_SYSTEM_PROMPT)
+    
+    def prompt_fingerprint(self) -> str:
+        """Version of the prompt template and the context/profile data it embeds"""
+        data = json.dumps([self.PROMPT_TEMPLATE_VERSION, self.korean_cultural_context, self.school_profiles],
+                          sort_keys=True)
+        return hashlib.sha256(data.encode('utf-8')).hexdigest()[:16]
+    
+    def reload_context(self) -> None:
+        """Reload cultural context and school profiles, invalidating the cache if they changed"""
+        self.korean_cultural_context = self._load_korean_context()
+        self.school_profiles = self._load_school_profiles()
+        self.response_cache.set_version(self.prompt_fingerprint())
+        self.prompt_builder = PromptBuilder(self.school_profiles, system_prompt=self.ANALYSIS_SYSTEM_PROMPT,
+                                            policy=self.prompt_builder.policy)
+    
+    def completion_request(self, system_prompt: str, prompt: str, max_tokens: int,
+                           model: str = "gpt-4", temperature: float = 0.3) -> tuple:
+        """(messages, params, cache key) of a chat completion request"""
+        messages = [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": prompt}
+        ]
+        params = {"temperature": temperature, "max_tokens": max_tokens}
+        return messages, params, LLMResponseCache.make_key(model, params, messages)
+    
+    def _complete_json(self, system_prompt: str, prompt: str, max_tokens: int,
+                       model: str = "gpt-4", temperature: float = 0.3) -> Any:
+        """Chat completion parsed as JSON, served from the response cache when possible
+        
+        Only responses that parse are cached.
+        """
+        messages, params, key = self.completion_request(system_prompt, prompt, max_tokens, model, temperature)
+        
+        content = self.response_cache.get(key)
+        if content is not None:
+            return json.loads(content)
+        
+        response = openai.ChatCompletion.create(model=model, messages=messages, **params)
+        content = response.choices[0].message.content
+        parsed = json.loads(content)
+        self.response_cache.set(key, content)
+        return parsed
+    
+    def _load_korean_context(self) -> Dict[str, Any]:
+        """Load Korean cultural context for better analysis"""
+        return {
+            "cultural_values": [
+                "Confucian values (respect for elders, education, harmony)",
+                "Collectivism vs individualism",
+                "Academic achievement pressure",
+                "Family expectations and filial piety",
+                "Korean work ethic and diligence",
+                "Cultural humility and modesty"
+            ],
+            "common_esl_patterns": [
+                "Article usage (a/an/the)",
+                "Preposition confusion",
+                "Verb tense consistency",
+                "Subject-verb agreement",
+                "Word order differences",
+                "Formal vs informal register"
+            ],
+            "cultural_translation_challenges": [
+                "Direct translation from Korean",
+                "Cultural concept explanation",
+                "Honorific system adaptation",
+                "Indirect communication style",
+                "Group-oriented thinking"
+            ]
+        }
+    
+    def _load_school_profiles(self) -> Dict[str, Dict[str, Any]]:
+        """Load target school profiles for better analysis"""
+        return {
+            "stanford": {
+                "name": "Stanford University",
+                "values": ["innovation", "entrepreneurship", "intellectual vitality", "diversity"],
+                "essay_preferences": ["personal stories", "intellectual curiosity", "leadership", "community impact"],
+                "cultural_fit": ["global perspective", "collaboration", "risk-taking"]
+            },
+            "harvard": {
+                "name": "Harvard University",
+                "values": ["leadership", "academic excellence", "service", "character"],
+                "essay_preferences": ["leadership examples", "intellectual growth", "service to others", "personal values"],
+                "cultural_fit": ["global citizenship", "ethical leadership", "intellectual rigor"]
+            },
+            "mit": {
+                "name": "MIT",
+                "values": ["innovation", "problem-solving", "collaboration", "hands-on learning"],
+                "essay_preferences": ["technical interests", "problem-solving examples", "collaboration", "practical applications"],
+                "cultural_fit": ["technical curiosity", "teamwork", "practical innovation"]
+            }
+        }
+    
+    def create_cultural_prompt(self, essay_text: str, essay_type: EssayType, 
+                             target_school: Optional[str] = None, 
+                             user_language: str = "ko") -> str:
+        """Create a culturally-aware prompt for GPT-4 analysis"""
+        return self.prompt_builder.render(essay_text, essay_type, target_school, user_language)
     
     def analyze_essay(self, essay_text: str, essay_type: EssayType, 
                      target_school: Optional[str] = None, 
@@ -296,56 +822,142 @@ class AdmitAIKoreaEssayAnalyzer:
         """Analyze essay using GPT-4 with Korean cultural context"""
         
         try:
-            # Create culturally-aware prompt
-            prompt = self.create_cultural_prompt(essay_text, essay_type, target_school, user_language)
+            # Create culturally-aware prompt(s) within the token budget
+            built = self.prompt_builder.build(essay_text, essay_type, target_school, user_language)
+            logger.info(f"Analysis prompt: {built.stats}")
             
-            # Call GPT-4 API
-            response = openai.ChatCompletion.create(
-                model="gpt-4",
-                messages=[
-                    {"role": "system", "content": "You are an expert college admissions essay analyst with deep understanding of Korean culture and U.S. college admissions."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.3,
-                max_tokens=2000
-            )
-            
-            # Parse response
-            analysis_data = json.loads(response.choices[0].message.content)
-            
-            # Convert to our data models
-            analytics = EssayAnalytics(**analysis_data["analytics"])
-            
-            feedback = []
-            for fb in analysis_data["feedback"]:
-                feedback.append(EssayFeedback(
-                    id=f"fb_{len(feedback)}",
-                    type=FeedbackType(fb["type"]),
-                    severity=FeedbackSeverity(fb["severity"]),
-                    title=fb["title"],
-                    description=fb["description"],
-                    suggestion=fb["suggestion"],
-                    line_number=fb.get("line_number"),
-                    word_range=tuple(fb["word_range"]) if fb.get("word_range") else None
-                ))
+            # Call GPT-4 API (or reuse the cached response) and parse it
+            analyses = [
+                self.build_analysis(essay_text, self._complete_json(self.ANALYSIS_SYSTEM_PROMPT, prompt, max_tokens=2000))
+                for prompt in built.prompts
+            ]
             
-            return EssayAnalysis(
-                essay_id=f"essay_{hash(essay_text) % 10000}",
-                analytics=analytics,
-                feedback=feedback,
-                summary=analysis_data["summary"],
-                recommendations=analysis_data["recommendations"],
-                cultural_context=analysis_data["cultural_context"]
-            )
+            analysis = self.merge_analyses(essay_text, analyses)
+            analysis.prompt_stats = built.stats
+            return analysis
             
         except Exception as e:
             logger.error(f"Essay analysis failed: {str(e)}")
             raise
     
+    def build_analysis(self, essay_text: str, analysis_data: Dict[str, Any]) -> EssayAnalysis:
+        """Convert the model's JSON answer to our data models"""
+        analytics = EssayAnalytics(**analysis_data["analytics"])
+        
+        feedback = [self.feedback_from_dict(fb, index) for index, fb in enumerate(analysis_data["feedback"])]
+        
+        return EssayAnalysis(
+            essay_id=f"essay_{hash(essay_text) % 10000}",
+            analytics=analytics,
+            feedback=feedback,
+            summary=analysis_data["summary"],
+            recommendations=analysis_data["recommendations"],
+            cultural_context=analysis_data["cultural_context"]
+        )
+    
+    def merge_analyses(self, essay_text: str, analyses: List[EssayAnalysis]) -> EssayAnalysis:
+        """Combine the analyses of an essay's chunks (a single analysis is returned as is)"""
+        if len(analyses) == 1:
+            return analyses[0]
+        
+        def mean(values):
+            values = [value for value in values if value is not None]
+            return round(sum(values) / len(values), 2) if values else None
+        
+        def unique(items):
+            return list(dict.fromkeys(items))
+        
+        stats = [analysis.analytics for analysis in analyses]
+        analytics = EssayAnalytics(
+            overall_score=mean(a.overall_score for a in stats),
+            grammar_score=mean(a.grammar_score for a in stats),
+            style_score=mean(a.style_score for a in stats),
+            content_score=mean(a.content_score for a in stats),
+            cultural_score=mean(a.cultural_score for a in stats),
+            structure_score=mean(a.structure_score for a in stats),
+            word_count=sum(a.word_count for a in stats),
+            reading_level=stats[0].reading_level,
+            cultural_insights=unique(insight for a in stats for insight in a.cultural_insights),
+            school_fit_score=mean(a.school_fit_score for a in stats)
+        )
+        
+        feedback = [fb for analysis in analyses for fb in analysis.feedback]
+        for index, fb in enumerate(feedback):
+            fb.id = f"fb_{index}"
+        
+        cultural_context = {}
+        for analysis in analyses:
+            for key, values in analysis.cultural_context.items():
+                cultural_context[key] = unique(cultural_context.get(key, []) + list(values))
+        
+        return EssayAnalysis(
+            essay_id=f"essay_{hash(essay_text) % 10000}",
+            analytics=analytics,
+            feedback=feedback,
+            summary=' '.join(analysis.summary for analysis in analyses),
+            recommendations=unique(rec for analysis in analyses for rec in analysis.recommendations),
+            cultural_context=cultural_context
+        )
+    
+    def feedback_from_dict(self, fb: Dict[str, Any], index: int) -> EssayFeedback:
+        return EssayFeedback(
+            id=f"fb_{index}",
+            type=FeedbackType(fb["type"]),
+            severity=FeedbackSeverity(fb["severity"]),
+            title=fb["title"],
+            description=fb["description"],
+            suggestion=fb["suggestion"],
+            line_number=fb.get("line_number"),
+            word_range=tuple(fb["word_range"]) if fb.get("word_range") else None
+        )
+    
+    def analyze_essay_stream(self, essay_text: str, essay_type: EssayType,
+                             target_school: Optional[str] = None,
+                             user_language: str = "ko") -> Iterator['StreamEvent']:
+        """Analyze essay, yielding feedback items and analytics fields as soon as GPT-4 has written them
+        
+        The first event carries the prompt stats. A stream covers one prompt,
+        so over-budget essays are trimmed rather than chunked.
+        """
+        built = self.prompt_builder.build(essay_text, essay_type, target_school, user_language,
+                                          policy=self.stream_prompt_policy())
+        yield StreamEvent('prompt_stats', built.stats)
+        messages, params, key = self.completion_request(self.ANALYSIS_SYSTEM_PROMPT, built.prompts[0], max_tokens=2000)
+        parser = StreamingAnalysisParser(self, essay_text)
+        
+        cached = self.response_cache.get(key)
+        if cached is not None:
+            yield from parser.feed(cached)
+            return
+        
+        response = openai.ChatCompletion.create(model="gpt-4", messages=messages, stream=True, **params)
+        for chunk in response:
+            delta = chunk.choices[0].delta.get("content")
+            if delta:
+                yield from parser.feed(delta)
+        
+        if not parser.done:
+            raise ValueError("Model response ended before the analysis was complete")
+        # Cache the parsed root rather than the raw stream, which may be fenced
+        self.response_cache.set(key, json.dumps(parser.result))
+    
+    def stream_prompt_policy(self) -> str:
+        return 'trim' if self.prompt_builder.policy == 'chunk' else self.prompt_builder.policy
+    
     def generate_cultural_insights(self, essay_text: str) -> List[str]:
         """Generate specific cultural insights for Korean students"""
         
-        prompt = f"""
+        try:
+            return self._complete_json(self.INSIGHTS_SYSTEM_PROMPT, self.create_insights_prompt(essay_text),
+                                       max_tokens=500)
+            
+        except Exception as e:
+            logger.error(f"Cultural insights generation failed: {str(e)}")
+            return ["Cultural analysis temporarily unavailable"]
+    
+    def create_insights_prompt(self, essay_text: str) -> str:
+        """Prompt for the cultural-insights call"""
+        return f"""
         Analyze this essay from a Korean cultural perspective and provide specific insights:
 
         ESSAY: {essay_text}
@@ -358,29 +970,671 @@ class AdmitAIKoreaEssayAnalyzer:
 
         Provide 3-5 specific insights as a JSON array of strings.
         """
+
+# =============================================================================
+# Streaming Analysis Parsing
+# =============================================================================
+
+class IncrementalJSONParser:
+    """JSON scanner fed in chunks that reports each value as soon as it is closed
+    
+    feed() returns (path, value) pairs for the values completed by that chunk,
+    innermost first. Paths are tuples of object keys and array indices; the
+    root value has path (). Values nested deeper than max_depth are not
+    reported (or decoded). Before the root value only whitespace and Markdown
+    code fence lines (```json) are skipped; any other text raises ValueError,
+    since brackets in prose cannot be told apart from the root value.
+    """
+    
+    SCALAR_END = ',}] \t\r\n'
+    
+    def __init__(self, max_depth: int = 2):
+        self.max_depth = max_depth
+        self.done = False
+        self._text = ''
+        self._pos = 0
+        # Open containers: [kind, start offset, current key or index, expecting a key]
+        self._stack = []
+        self._in_string = False
+        self._escaped = False
+        self._string_is_key = False
+        self._value_start = 0
+        self._scalar_start = None
+    
+    def feed(self, chunk: str) -> List[Tuple[tuple, Any]]:
+        completed = []
+        self._text += chunk
+        text = self._text
+        i = self._pos
         
-        try:
-            response = openai.ChatCompletion.create(
-                model="gpt-4",
-                messages=[
-                    {"role": "system", "content": "You are a cultural bridge expert specializing in Korean-American cultural exchange."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.3,
-                max_tokens=500
+        while i < len(text) and not self.done:
+            c = text[i]
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif c == '\\':
+                    self._escaped = True
+                elif c == '"':
+                    self._in_string = False
+                    if self._string_is_key:
+                        self._stack[-1][2] = json.loads(text[self._value_start:i + 1])
+                    else:
+                        self._complete(self._value_start, i + 1, completed)
+            elif self._scalar_start is not None:
+                if c in self.SCALAR_END:
+                    start, self._scalar_start = self._scalar_start, None
+                    self._complete(start, i, completed)
+                    # The terminator itself still needs handling
+                    continue
+            elif not self._stack:
+                if c in '{[':
+                    self._stack.append(['object' if c == '{' else 'array', i, None if c == '{' else 0, True])
+                elif c == '`':
+                    line_end = text.find('\n', i)
+                    if line_end == -1 and len(text) - i < 3:
+                        # Wait for the rest of the fence
+                        break
+                    if not text.startswith('```', i):
+                        raise ValueError(f"Unexpected text before the JSON value: {text[i:i + 20]!r}")
+                    if line_end == -1:
+                        break
+                    i = line_end
+                elif not c.isspace():
+                    raise ValueError(f"Unexpected text before the JSON value: {text[i:i + 20]!r}")
+            elif c == '"':
+                frame = self._stack[-1]
+                self._in_string = True
+                self._string_is_key = frame[0] == 'object' and frame[3]
+                self._value_start = i
+            elif c in '{[':
+                self._stack.append(['object' if c == '{' else 'array', i, None if c == '{' else 0, True])
+            elif c in '}]':
+                frame = self._stack.pop()
+                self._complete(frame[1], i + 1, completed)
+            elif c == ':':
+                self._stack[-1][3] = False
+            elif c == ',':
+                frame = self._stack[-1]
+                if frame[0] == 'object':
+                    frame[3] = True
+                else:
+                    frame[2] += 1
+            elif not c.isspace():
+                self._scalar_start = i
+            i += 1
+        
+        self._pos = i
+        return completed
+    
+    def _complete(self, start: int, end: int, completed: List[Tuple[tuple, Any]]) -> None:
+        if not self._stack:
+            self.done = True
+        if len(self._stack) <= self.max_depth:
+            path = tuple(frame[2] for frame in self._stack)
+            completed.append((path, json.loads(self._text[start:end])))
+
+@dataclass
+class StreamEvent:
+    """One piece of a streamed analysis
+    
+    kind is 'prompt_stats' (PromptBuilder stats, first),
+    'analytics_field' (name, value), 'analytics' (EssayAnalytics),
+    'feedback' (EssayFeedback), 'field' (summary, recommendations or
+    cultural_context) or 'analysis' (the complete EssayAnalysis, last).
+    """
+    kind: str
+    value: Any
+    name: Optional[str] = None
+
+class StreamingAnalysisParser:
+    """Turns a streamed analysis completion into StreamEvents as its parts complete"""
+    
+    TOP_LEVEL_FIELDS = ('summary', 'recommendations', 'cultural_context')
+    
+    def __init__(self, analyzer: 'AdmitAIKoreaEssayAnalyzer', essay_text: str):
+        self.analyzer = analyzer
+        self.essay_text = essay_text
+        self.parser = IncrementalJSONParser(max_depth=2)
+        self.result: Optional[Dict[str, Any]] = None
+    
+    @property
+    def done(self) -> bool:
+        return self.parser.done
+    
+    def feed(self, chunk: str) -> List[StreamEvent]:
+        events = []
+        for path, value in self.parser.feed(chunk):
+            if len(path) == 2 and path[0] == 'analytics':
+                events.append(StreamEvent('analytics_field', value, name=path[1]))
+            elif len(path) == 2 and path[0] == 'feedback':
+                events.append(StreamEvent('feedback', self.analyzer.feedback_from_dict(value, path[1])))
+            elif path == ('analytics',):
+                events.append(StreamEvent('analytics', EssayAnalytics(**value)))
+            elif len(path) == 1 and path[0] in self.TOP_LEVEL_FIELDS:
+                events.append(StreamEvent('field', value, name=path[0]))
+            elif path == ():
+                self.result = value
+                events.append(StreamEvent('analysis', self.analyzer.build_analysis(self.essay_text, value)))
+        return events
+
+# =============================================================================
+# Async LLM Client
+# =============================================================================
+
+class TokenBucket:
+    """Async token bucket: `rate` requests per second with bursts up to `capacity`"""
+    
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = None
+    
+    async def acquire(self) -> None:
+        if self.rate <= 0:
+            return
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        # Waiters queue on the lock, so tokens are handed out in arrival order
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+class LLMRequestError(Exception):
+    """A chat completion request that failed (after any retries)"""
+    
+    def __init__(self, message: str, status: Optional[int] = None, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.status = status
+        self.retry_after = retry_after
+
+class AsyncChatClient:
+    """Async chat-completions client shared by every request of a process
+    
+    All calls go through one concurrency cap and one token-bucket rate limit.
+    Timeouts, connection errors, 429 and 5xx answers are retried with jittered
+    exponential backoff (or the server's Retry-After). Point base_url at a
+    local stub server (see run_stub_llm_server) to test without the real API.
+    """
+    
+    RETRY_STATUSES = {408, 409, 429, 500, 502, 503, 504}
+    
+    def __init__(self, api_key: str,
+                 base_url: str = os.environ.get('ESSAY_LLM_BASE_URL', 'https://api.openai.com/v1'),
+                 max_concurrency: int = int(os.environ.get('ESSAY_LLM_MAX_CONCURRENCY', '8')),
+                 requests_per_second: float = float(os.environ.get('ESSAY_LLM_RPS', '3')),
+                 burst: Optional[float] = None, max_retries: int = 3,
+                 backoff_base: float = 0.5, backoff_max: float = 8.0, timeout: float = 60.0):
+        self.api_key = api_key
+        self.base_url = base_url.rstrip('/')
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.timeout = timeout
+        self.bucket = TokenBucket(requests_per_second, burst)
+        self._slots = None
+        self._session = None
+        self.latencies = deque(maxlen=1000)
+        self.stats = {'calls': 0, 'retries': 0, 'failures': 0, 'in_flight': 0}
+    
+    async def _get_session(self):
+        import aiohttp
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+                headers={'Authorization': f'Bearer {self.api_key}'}
             )
+        return self._session
+    
+    async def close(self) -> None:
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+    
+    async def chat(self, model: str, messages: List[Dict[str, str]], **params) -> str:
+        """Completion text for a chat request"""
+        import aiohttp
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_concurrency)
+        payload = {'model': model, 'messages': messages, **params}
+        
+        for attempt in range(self.max_retries + 1):
+            await self.bucket.acquire()
+            async with self._slots:
+                self.stats['in_flight'] += 1
+                started = time.perf_counter()
+                try:
+                    session = await self._get_session()
+                    async with session.post(f'{self.base_url}/chat/completions', json=payload) as response:
+                        if response.status == 200:
+                            body = await response.json()
+                            self._record_latency(model, started, attempt)
+                            return body['choices'][0]['message']['content']
+                        error = LLMRequestError(
+                            f"HTTP {response.status}: {(await response.text())[:200]}",
+                            response.status, _parse_retry_after(response.headers.get('Retry-After'))
+                        )
+                except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                    error = LLMRequestError(f"{type(e).__name__}: {str(e)}")
+                finally:
+                    self.stats['in_flight'] -= 1
             
-            return json.loads(response.choices[0].message.content)
+            await self._backoff(error, attempt)
+    
+    async def chat_stream(self, model: str, messages: List[Dict[str, str]], **params) -> AsyncIterator[str]:
+        """Completion text deltas of a streamed chat request
+        
+        Failures are retried only until the first delta has been yielded.
+        """
+        import aiohttp
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_concurrency)
+        payload = {'model': model, 'messages': messages, 'stream': True, **params}
+        
+        for attempt in range(self.max_retries + 1):
+            await self.bucket.acquire()
+            streaming = False
+            async with self._slots:
+                self.stats['in_flight'] += 1
+                started = time.perf_counter()
+                try:
+                    session = await self._get_session()
+                    async with session.post(f'{self.base_url}/chat/completions', json=payload) as response:
+                        if response.status == 200:
+                            async for line in response.content:
+                                line = line.decode('utf-8').strip()
+                                if not line.startswith('data:'):
+                                    continue
+                                data = line[len('data:'):].strip()
+                                if data == '[DONE]':
+                                    break
+                                delta = json.loads(data)['choices'][0].get('delta', {}).get('content')
+                                if delta:
+                                    streaming = True
+                                    yield delta
+                            self._record_latency(model, started, attempt)
+                            return
+                        error = LLMRequestError(
+                            f"HTTP {response.status}: {(await response.text())[:200]}",
+                            response.status, _parse_retry_after(response.headers.get('Retry-After'))
+                        )
+                except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                    error = LLMRequestError(f"{type(e).__name__}: {str(e)}")
+                    if streaming:
+                        # Part of the answer is already out; a retry would repeat it
+                        self.stats['failures'] += 1
+                        raise error
+                finally:
+                    self.stats['in_flight'] -= 1
             
+            await self._backoff(error, attempt)
+    
+    async def _backoff(self, error: LLMRequestError, attempt: int) -> None:
+        """Sleep before the next attempt, or raise when the error is final"""
+        retryable = error.status is None or error.status in self.RETRY_STATUSES
+        if not retryable or attempt == self.max_retries:
+            self.stats['failures'] += 1
+            raise error
+        
+        # Full jitter keeps retries from many requests from arriving in lockstep
+        delay = error.retry_after or random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+        self.stats['retries'] += 1
+        logger.warning(f"LLM call failed ({str(error)}), retry {attempt + 1}/{self.max_retries} in {delay:.2f}s")
+        await asyncio.sleep(delay)
+    
+    def _record_latency(self, model: str, started: float, attempt: int) -> None:
+        latency = time.perf_counter() - started
+        self.latencies.append(latency)
+        self.stats['calls'] += 1
+        logger.info(f"LLM call to {model} took {latency * 1000:.0f}ms (attempt {attempt + 1})")
+    
+    def get_stats(self) -> Dict[str, Any]:
+        ordered = sorted(self.latencies)
+        pick = lambda fraction: round(ordered[int((len(ordered) - 1) * fraction)] * 1000, 1) if ordered else None
+        return {**self.stats, 'p50_ms': pick(0.5), 'p95_ms': pick(0.95), 'max_concurrency': self.max_concurrency}
+
+def _parse_retry_after(value: Optional[str]) -> Optional[float]:
+    try:
+        return max(0.0, float(value)) if value else None
+    except ValueError:
+        return None
+
+class AsyncEssayAnalyzer:
+    """Async analysis path: the full analysis and the cultural-insights call run concurrently
+    
+    Prompts, response cache and result conversion are shared with the
+    synchronous AdmitAIKoreaEssayAnalyzer.
+    """
+    
+    def __init__(self, analyzer: AdmitAIKoreaEssayAnalyzer, client: AsyncChatClient):
+        self.analyzer = analyzer
+        self.client = client
+    
+    async def _complete_json(self, system_prompt: str, prompt: str, max_tokens: int,
+                             model: str = "gpt-4", temperature: float = 0.3) -> Any:
+        messages, params, key = self.analyzer.completion_request(
+            system_prompt, prompt, max_tokens, model, temperature
+        )
+        content = self.analyzer.response_cache.get(key)
+        if content is not None:
+            return json.loads(content)
+        
+        content = await self.client.chat(model, messages, **params)
+        parsed = json.loads(content)
+        self.analyzer.response_cache.set(key, content)
+        return parsed
+    
+    async def generate_cultural_insights(self, essay_text: str) -> List[str]:
+        try:
+            return await self._complete_json(
+                self.analyzer.INSIGHTS_SYSTEM_PROMPT, self.analyzer.create_insights_prompt(essay_text),
+                max_tokens=500
+            )
         except Exception as e:
             logger.error(f"Cultural insights generation failed: {str(e)}")
-            return ["Cultural analysis temporarily unavailable"]
+            return []
+    
+    async def analyze_essay(self, essay_text: str, essay_type: EssayType,
+                            target_school: Optional[str] = None,
+                            user_language: str = "ko") -> EssayAnalysis:
+        built = self.analyzer.prompt_builder.build(essay_text, essay_type, target_school, user_language)
+        logger.info(f"Analysis prompt: {built.stats}")
+        *chunk_data, insights = await asyncio.gather(
+            *[self._complete_json(self.analyzer.ANALYSIS_SYSTEM_PROMPT, prompt, max_tokens=2000)
+              for prompt in built.prompts],
+            self.generate_cultural_insights(essay_text)
+        )
+        
+        analysis = self.analyzer.merge_analyses(
+            essay_text, [self.analyzer.build_analysis(essay_text, data) for data in chunk_data]
+        )
+        known = set(analysis.analytics.cultural_insights)
+        analysis.analytics.cultural_insights += [insight for insight in insights if insight not in known]
+        analysis.prompt_stats = built.stats
+        return analysis
+    
+    async def analyze_essay_stream(self, essay_text: str, essay_type: EssayType,
+                                   target_school: Optional[str] = None,
+                                   user_language: str = "ko") -> AsyncIterator[StreamEvent]:
+        """Async counterpart of AdmitAIKoreaEssayAnalyzer.analyze_essay_stream"""
+        built = self.analyzer.prompt_builder.build(essay_text, essay_type, target_school, user_language,
+                                                   policy=self.analyzer.stream_prompt_policy())
+        yield StreamEvent('prompt_stats', built.stats)
+        messages, params, key = self.analyzer.completion_request(
+            self.analyzer.ANALYSIS_SYSTEM_PROMPT, built.prompts[0], max_tokens=2000
+        )
+        parser = StreamingAnalysisParser(self.analyzer, essay_text)
+        
+        cached = self.analyzer.response_cache.get(key)
+        if cached is not None:
+            for event in parser.feed(cached):
+                yield event
+            return
+        
+        async for delta in self.client.chat_stream("gpt-4", messages, **params):
+            for event in parser.feed(delta):
+                yield event
+        
+        if not parser.done:
+            raise ValueError("Model response ended before the analysis was complete")
+        self.analyzer.response_cache.set(key, json.dumps(parser.result))
+
+# =============================================================================
+# Hybrid Local-First Analysis
+# =============================================================================
+
+WORD_RE = re.compile(r"[A-Za-z0-9]+(?:['’-][A-Za-z0-9]+)*")
+
+def count_syllables(word: str) -> int:
+    """Vowel-group estimate, ignoring a silent final 'e'"""
+    word = word.lower()
+    groups = len(re.findall(r'[aeiouy]+', word))
+    if word.endswith('e') and not word.endswith(('le', 'ee')) and groups > 1:
+        groups -= 1
+    return max(1, groups)
+
+def text_statistics(essay_text: str) -> Dict[str, Any]:
+    """Length, sentence, paragraph and readability measures of an essay"""
+    paragraphs = [p for p in re.split(r'\n\s*\n', essay_text.strip()) if p.strip()]
+    sentences = [s for s in PromptBuilder.SENTENCE_RE.split(essay_text.strip()) if WORD_RE.search(s)]
+    sentence_lengths = [len(WORD_RE.findall(sentence)) for sentence in sentences]
+    words = WORD_RE.findall(essay_text)
+    word_count = len(words)
+    sentence_count = max(1, len(sentences))
+    syllables = sum(count_syllables(word) for word in words)
+    
+    avg_length = word_count / sentence_count
+    variance = sum((length - avg_length) ** 2 for length in sentence_lengths) / sentence_count
+    syllables_per_word = syllables / word_count if word_count else 0.0
+    return {
+        'word_count': word_count,
+        'sentence_count': len(sentences),
+        'paragraph_count': len(paragraphs),
+        'avg_sentence_length': avg_length,
+        # Coefficient of variation: low values read as monotonous
+        'sentence_length_variation': math.sqrt(variance) / avg_length if avg_length else 0.0,
+        'long_sentences': sum(1 for length in sentence_lengths if length > 40),
+        'flesch_reading_ease': 206.835 - 1.015 * avg_length - 84.6 * syllables_per_word,
+        'flesch_kincaid_grade': 0.39 * avg_length + 11.8 * syllables_per_word - 15.59
+    }
+
+def score_structure(stats: Dict[str, Any]) -> float:
+    """Structure score (1-10) from paragraphing and sentence rhythm"""
+    score = 10.0
+    paragraphs = stats['paragraph_count']
+    if paragraphs < 3:
+        score -= 3.0 if paragraphs <= 1 else 1.5
+    elif stats['word_count'] / paragraphs < 40:
+        score -= 1.5
+    if not 10 <= stats['avg_sentence_length'] <= 25:
+        score -= 1.5
+    if stats['sentence_count'] > 3 and stats['sentence_length_variation'] < 0.25:
+        score -= 1.0
+    if stats['long_sentences'] > 0.1 * stats['sentence_count']:
+        score -= 1.0
+    return max(1.0, score)
+
+# Directory of grammarService.py; defaults to backend/services of this checkout
+GRAMMAR_SERVICE_PATH = os.environ.get(
+    'GRAMMAR_SERVICE_PATH',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, 'backend', 'services')
+)
+
+def _local_grammar_analyzer():
+    """The grammar service's in-process analyzer, imported from GRAMMAR_SERVICE_PATH"""
+    path = os.path.normpath(GRAMMAR_SERVICE_PATH)
+    if path not in sys.path:
+        sys.path.append(path)
+    from grammarService import get_analyzer
+    return get_analyzer()
+
+class HybridEssayAnalyzer:
+    """Local-first analysis: measure locally, ask GPT-4 only for judgement
+    
+    Grammar issues (LanguageTool), word count, readability, style (the spaCy
+    features of OriginalEssayGrader) and structure are computed locally and
+    sent to the model as a few lines of facts. The model only scores content,
+    cultural adaptation and school fit, so both the prompt's instructions and
+    the completion are much shorter. Everything is merged into one
+    EssayAnalysis. Falls back to the full GPT-4 analysis when spaCy or the
+    grammar service cannot be loaded, or LanguageTool is unavailable.
+    """
+    
+    # Weights of the full analysis prompt
+    SCORE_WEIGHTS = {
+        'grammar_score': 0.25,
+        'style_score': 0.20,
+        'content_score': 0.30,
+        'cultural_score': 0.15,
+        'structure_score': 0.10
+    }
+    JUDGEMENT_MAX_TOKENS = 1000
+    
+    def __init__(self, analyzer: AdmitAIKoreaEssayAnalyzer, grader: Optional[OriginalEssayGrader] = None,
+                 grammar=None):
+        self.analyzer = analyzer
+        self.grader = grader if grader is not None else self._load_local('spaCy', OriginalEssayGrader)
+        self.grammar = grammar if grammar is not None else self._load_local('Grammar service', _local_grammar_analyzer)
+        self._prompt_builder = None
+        self._profiles = None
+    
+    @staticmethod
+    def _load_local(name: str, factory: Callable[[], Any]) -> Any:
+        """A local tool, or None when it cannot be imported or started"""
+        try:
+            return factory()
+        except Exception as e:
+            logger.warning(f"{name} unavailable, hybrid analysis will use full GPT-4 analysis: {str(e)}")
+            return None
+    
+    @property
+    def prompt_builder(self) -> PromptBuilder:
+        # Rebuilt after analyzer.reload_context() replaces the school profiles
+        if self._profiles is not self.analyzer.school_profiles:
+            self._prompt_builder = PromptBuilder(
+                self.analyzer.school_profiles,
+                system_prompt=self.analyzer.ANALYSIS_SYSTEM_PROMPT,
+                completion_tokens=self.JUDGEMENT_MAX_TOKENS,
+                policy=self.analyzer.prompt_builder.policy,
+                template=render_judgement_prompt
+            )
+            self._profiles = self.analyzer.school_profiles
+        return self._prompt_builder
+    
+    def local_analysis(self, essay_text: str) -> Optional[Dict[str, Any]]:
+        """Grammar, statistics and local scores; None if the local tools are unavailable"""
+        if self.grammar is None or self.grader is None:
+            return None
+        grammar = self.grammar.analyze_text(essay_text)
+        if 'error' in grammar:
+            logger.warning(f"Local grammar check unavailable: {grammar['error']}")
+            return None
+        
+        features = self.grader.extract_features(essay_text)
+        stats = text_statistics(essay_text)
+        style = self.grader.grade_batch(self.grader.features_to_matrix([features]))[0]
+        return {
+            'grammar': grammar,
+            'features': features,
+            'stats': stats,
+            'scores': {
+                # The 0-100 grammar score hits 0 at 20 issues; keep it on the 1-10 scale
+                'grammar_score': max(1.0, round(grammar['score'] / 10, 1)),
+                'style_score': round(float(style), 1),
+                'structure_score': score_structure(stats)
+            }
+        }
+    
+    def format_facts(self, local: Dict[str, Any]) -> str:
+        """Compact summary of the local analysis for the prompt"""
+        stats = local['stats']
+        scores = local['scores']
+        return "\n        ".join([
+            f"Length: {stats['word_count']} words, {stats['sentence_count']} sentences "
+            f"(avg {stats['avg_sentence_length']:.1f} words), {stats['paragraph_count']} paragraphs",
+            f"Readability: Flesch-Kincaid grade {stats['flesch_kincaid_grade']:.1f}, "
+            f"reading ease {stats['flesch_reading_ease']:.0f}",
+            f"Vocabulary diversity: {local['features']['vocabulary_diversity']:.2f}",
+            f"Grammar (LanguageTool): {local['grammar']['summary']}",
+            f"Local scores (1-10): grammar {scores['grammar_score']}, style {scores['style_score']}, "
+            f"structure {scores['structure_score']}"
+        ])
+    
+    def analyze_essay(self, essay_text: str, essay_type: EssayType,
+                      target_school: Optional[str] = None,
+                      user_language: str = "ko") -> EssayAnalysis:
+        """Analyze essay locally first, then with a judgement-only GPT-4 prompt"""
+        started = time.perf_counter()
+        local = self.local_analysis(essay_text)
+        if local is None:
+            return self.analyzer.analyze_essay(essay_text, essay_type, target_school, user_language)
+        local_ms = round((time.perf_counter() - started) * 1000, 2)
+        
+        built = self.prompt_builder.build(essay_text, essay_type, target_school, user_language,
+                                          extra=(self.format_facts(local),))
+        built.stats.update(mode='hybrid', local_ms=local_ms)
+        logger.info(f"Hybrid analysis prompt: {built.stats}")
+        
+        try:
+            analyses = [
+                self.build_analysis(essay_text, local, self.analyzer._complete_json(
+                    self.analyzer.ANALYSIS_SYSTEM_PROMPT, prompt, max_tokens=self.JUDGEMENT_MAX_TOKENS
+                ))
+                for prompt in built.prompts
+            ]
+        except Exception as e:
+            logger.error(f"Essay analysis failed: {str(e)}")
+            raise
+        
+        analysis = self.analyzer.merge_analyses(essay_text, analyses)
+        # Local measures cover the whole essay, not each chunk
+        analysis.analytics.word_count = local['stats']['word_count']
+        analysis.feedback = self.grammar_feedback(essay_text, local['grammar']['issues']) + analysis.feedback
+        for index, fb in enumerate(analysis.feedback):
+            fb.id = f"fb_{index}"
+        analysis.prompt_stats = built.stats
+        return analysis
+    
+    def build_analysis(self, essay_text: str, local: Dict[str, Any], judgement: Dict[str, Any]) -> EssayAnalysis:
+        """Merge the local scores with the model's judgement"""
+        judged = judgement["analytics"]
+        scores = {
+            **local['scores'],
+            'content_score': judged['content_score'],
+            'cultural_score': judged['cultural_score']
+        }
+        stats = local['stats']
+        analytics = EssayAnalytics(
+            overall_score=round(sum(scores[name] * weight for name, weight in self.SCORE_WEIGHTS.items()), 1),
+            word_count=stats['word_count'],
+            reading_level=f"Grade {max(1, round(stats['flesch_kincaid_grade']))} (Flesch-Kincaid)",
+            cultural_insights=judged.get('cultural_insights', []),
+            school_fit_score=judged.get('school_fit_score'),
+            **scores
+        )
+        
+        return EssayAnalysis(
+            essay_id=f"essay_{hash(essay_text) % 10000}",
+            analytics=analytics,
+            feedback=[self.analyzer.feedback_from_dict(fb, index) for index, fb in enumerate(judgement["feedback"])],
+            summary=judgement["summary"],
+            recommendations=judgement["recommendations"],
+            cultural_context=judgement["cultural_context"]
+        )
+    
+    def grammar_feedback(self, essay_text: str, issues: List[Dict[str, Any]]) -> List[EssayFeedback]:
+        """Feedback items for LanguageTool issues"""
+        feedback = []
+        for issue in issues:
+            start, end = issue['offset'], issue['offset'] + issue['length']
+            flagged = essay_text[start:end]
+            first_word = len(WORD_RE.findall(essay_text[:start]))
+            feedback.append(EssayFeedback(
+                id="",
+                type=FeedbackType.GRAMMAR,
+                severity=FeedbackSeverity(issue['severity']),
+                title=issue['category'].replace('_', ' ').capitalize(),
+                description=issue['message'],
+                suggestion=f'Replace "{flagged}" with "{issue["suggestion"]}"' if issue['suggestion']
+                           else f'Review "{flagged}"',
+                line_number=essay_text.count('\n', 0, start) + 1,
+                word_range=(first_word, first_word + max(1, len(WORD_RE.findall(flagged))))
+            ))
+        return feedback
 
 # =============================================================================
 # Integration Example: Flask API Endpoint
 # =============================================================================
 
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, stream_with_context
 from flask_cors import CORS
 
 app = Flask(__name__)
@@ -389,6 +1643,72 @@ CORS(app)
 # Initialize analyzer
 analyzer = AdmitAIKoreaEssayAnalyzer(openai_api_key="your-openai-api-key")
 
+def feedback_to_dict(fb: EssayFeedback) -> Dict[str, Any]:
+    return {
+        'id': fb.id,
+        'type': fb.type.value,
+        'severity': fb.severity.value,
+        'title': fb.title,
+        'description': fb.description,
+        'suggestion': fb.suggestion,
+        'line_number': fb.line_number,
+        'word_range': fb.word_range
+    }
+
+def analytics_to_dict(analytics: EssayAnalytics) -> Dict[str, Any]:
+    return {
+        'overall_score': analytics.overall_score,
+        'grammar_score': analytics.grammar_score,
+        'style_score': analytics.style_score,
+        'content_score': analytics.content_score,
+        'cultural_score': analytics.cultural_score,
+        'structure_score': analytics.structure_score,
+        'word_count': analytics.word_count,
+        'reading_level': analytics.reading_level,
+        'cultural_insights': analytics.cultural_insights,
+        'school_fit_score': analytics.school_fit_score
+    }
+
+def analysis_to_dict(analysis: EssayAnalysis) -> Dict[str, Any]:
+    """Convert an analysis to a JSON-serializable dict"""
+    return {
+        'essay_id': analysis.essay_id,
+        'analytics': analytics_to_dict(analysis.analytics),
+        'feedback': [feedback_to_dict(fb) for fb in analysis.feedback],
+        'summary': analysis.summary,
+        'recommendations': analysis.recommendations,
+        'cultural_context': analysis.cultural_context,
+        'prompt_stats': analysis.prompt_stats
+    }
+
+def stream_event_to_dict(event: StreamEvent) -> Dict[str, Any]:
+    """One NDJSON record of a streamed analysis"""
+    if event.kind == 'feedback':
+        return {'type': 'feedback', 'feedback': feedback_to_dict(event.value)}
+    if event.kind == 'analytics':
+        return {'type': 'analytics', 'analytics': analytics_to_dict(event.value)}
+    if event.kind == 'analysis':
+        return {'type': 'done', 'essay_id': event.value.essay_id}
+    return {'type': event.kind, 'name': event.name, 'value': event.value}
+
+def parse_analysis_request(data: Any) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+    """analyze_essay keyword arguments from a request body, or a validation error"""
+    if not isinstance(data, dict):
+        return None, 'JSON body required'
+    for field in ['content', 'type']:
+        if field not in data:
+            return None, f'Missing required field: {field}'
+    try:
+        essay_type = EssayType(data['type'])
+    except ValueError:
+        return None, 'Invalid essay type'
+    return {
+        'essay_text': data['content'],
+        'essay_type': essay_type,
+        'target_school': data.get('target_school'),
+        'user_language': data.get('language', 'ko')
+    }, None
+
 @app.route('/api/essays/analyze', methods=['POST'])
 def analyze_essay():
     """API endpoint for essay analysis"""
@@ -416,45 +1736,191 @@ def analyze_essay():
             user_language=data.get('language', 'ko')
         )
         
-        # Convert to JSON-serializable format
-        result = {
-            'essay_id': analysis.essay_id,
-            'analytics': {
-                'overall_score': analysis.analytics.overall_score,
-                'grammar_score': analysis.analytics.grammar_score,
-                'style_score': analysis.analytics.style_score,
-                'content_score': analysis.analytics.content_score,
-                'cultural_score': analysis.analytics.cultural_score,
-                'structure_score': analysis.analytics.structure_score,
-                'word_count': analysis.analytics.word_count,
-                'reading_level': analysis.analytics.reading_level,
-                'cultural_insights': analysis.analytics.cultural_insights,
-                'school_fit_score': analysis.analytics.school_fit_score
-            },
-            'feedback': [
-                {
-                    'id': fb.id,
-                    'type': fb.type.value,
-                    'severity': fb.severity.value,
-                    'title': fb.title,
-                    'description': fb.description,
-                    'suggestion': fb.suggestion,
-                    'line_number': fb.line_number,
-                    'word_range': fb.word_range
-                }
-                for fb in analysis.feedback
-            ],
-            'summary': analysis.summary,
-            'recommendations': analysis.recommendations,
-            'cultural_context': analysis.cultural_context
-        }
+        return jsonify(analysis_to_dict(analysis)), 200
         
-        return jsonify(result), 200
+    except Exception as e:
+        logger.error(f"API error: {str(e)}")
+        return jsonify({'error': 'Analysis failed'}), 500
+
+@app.route('/api/essays/analyze/stream', methods=['POST'])
+def analyze_essay_stream():
+    """Chunked NDJSON analysis: feedback items and analytics fields as soon as they are written"""
+    
+    kwargs, error = parse_analysis_request(request.get_json(silent=True))
+    if error:
+        return jsonify({'error': error}), 400
+    
+    def records():
+        try:
+            for event in analyzer.analyze_essay_stream(**kwargs):
+                yield json.dumps(stream_event_to_dict(event)) + '\n'
+        except Exception as e:
+            logger.error(f"Streaming analysis failed: {str(e)}")
+            yield json.dumps({'type': 'error', 'error': 'Analysis failed'}) + '\n'
+    
+    return Response(stream_with_context(records()), mimetype='application/x-ndjson',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+# Created on first use: loads spaCy and LanguageTool
+hybrid_analyzer = None
+
+def get_hybrid_analyzer() -> HybridEssayAnalyzer:
+    global hybrid_analyzer
+    if hybrid_analyzer is None:
+        hybrid_analyzer = HybridEssayAnalyzer(analyzer)
+    return hybrid_analyzer
+
+@app.route('/api/essays/analyze/hybrid', methods=['POST'])
+def analyze_essay_hybrid():
+    """Essay analysis with grammar, length and readability computed locally"""
+    
+    kwargs, error = parse_analysis_request(request.get_json(silent=True))
+    if error:
+        return jsonify({'error': error}), 400
+    
+    try:
+        analysis = get_hybrid_analyzer().analyze_essay(**kwargs)
+        return jsonify(analysis_to_dict(analysis)), 200
         
     except Exception as e:
         logger.error(f"API error: {str(e)}")
         return jsonify({'error': 'Analysis failed'}), 500
 
+# =============================================================================
+# Integration Example: Async (ASGI) Endpoint
+# =============================================================================
+
+def create_async_app(analyzer: AdmitAIKoreaEssayAnalyzer, client: AsyncChatClient):
+    """Starlette app for /api/essays/analyze that does not hold a worker during LLM calls
+    
+    Run it under uvicorn, one event loop per process, so the client's
+    concurrency cap and rate limit apply across all requests.
+    """
+    from starlette.applications import Starlette
+    from starlette.responses import JSONResponse, StreamingResponse
+    from starlette.routing import Route
+    
+    async_analyzer = AsyncEssayAnalyzer(analyzer, client)
+    
+    async def read_request(request):
+        try:
+            data = await request.json()
+        except ValueError:
+            data = None
+        return parse_analysis_request(data)
+    
+    async def analyze(request):
+        kwargs, error = await read_request(request)
+        if error:
+            return JSONResponse({'error': error}, status_code=400)
+        
+        try:
+            analysis = await async_analyzer.analyze_essay(**kwargs)
+            return JSONResponse(analysis_to_dict(analysis))
+        except LLMRequestError as e:
+            logger.error(f"API error: {str(e)}")
+            status = 503 if e.status in (429, None) or (e.status or 0) >= 500 else 502
+            return JSONResponse({'error': 'Analysis service unavailable'}, status_code=status)
+        except Exception as e:
+            logger.error(f"API error: {str(e)}")
+            return JSONResponse({'error': 'Analysis failed'}, status_code=500)
+    
+    async def analyze_stream(request):
+        kwargs, error = await read_request(request)
+        if error:
+            return JSONResponse({'error': error}, status_code=400)
+        
+        async def records():
+            try:
+                async for event in async_analyzer.analyze_essay_stream(**kwargs):
+                    yield json.dumps(stream_event_to_dict(event)) + '\n'
+            except Exception as e:
+                logger.error(f"Streaming analysis failed: {str(e)}")
+                yield json.dumps({'type': 'error', 'error': 'Analysis failed'}) + '\n'
+        
+        return StreamingResponse(records(), media_type='application/x-ndjson',
+                                 headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+    
+    async def stats(request):
+        return JSONResponse({'llm': client.get_stats(), 'cache': analyzer.response_cache.get_stats()})
+    
+    @contextlib.asynccontextmanager
+    async def lifespan(app):
+        yield
+        await client.close()
+    
+    return Starlette(
+        lifespan=lifespan,
+        routes=[
+            Route('/api/essays/analyze', analyze, methods=['POST']),
+            Route('/api/essays/analyze/stream', analyze_stream, methods=['POST']),
+            Route('/api/essays/stats', stats, methods=['GET'])
+        ]
+    )
+
+# =============================================================================
+# Local Stub LLM Server (for testing the async client)
+# =============================================================================
+
+STUB_ANALYSIS = {
+    "analytics": {
+        "overall_score": 7.5, "grammar_score": 8.0, "style_score": 7.0, "content_score": 7.5,
+        "cultural_score": 8.0, "structure_score": 7.0, "word_count": 180, "reading_level": "Grade 11",
+        "cultural_insights": ["Family values are presented authentically"], "school_fit_score": 7.0
+    },
+    "feedback": [{
+        "type": "content", "severity": "medium", "title": "Show the impact",
+        "description": "The club project is described but its results are not.",
+        "suggestion": "Add one concrete outcome of the language exchange app.",
+        "line_number": 6, "word_range": [40, 58]
+    }],
+    "summary": "A clear personal statement that would benefit from more concrete outcomes.",
+    "recommendations": ["Quantify the app's reach", "Tighten the opening"],
+    "cultural_context": {
+        "korean_values_present": ["family"], "cultural_bridge_opportunities": ["technology"],
+        "esl_improvements": ["articles"]
+    }
+}
+STUB_INSIGHTS = ["Your grandmother's story bridges generations and cultures"]
+
+def run_stub_llm_server(port: int = 8089, latency: float = 0.5, failure_rate: float = 0.0) -> None:
+    """OpenAI-compatible /v1/chat/completions stub with canned answers
+    
+    Each request sleeps `latency` seconds; a `failure_rate` share answers 503
+    so retries can be exercised. Use with ESSAY_LLM_BASE_URL=http://localhost:8089/v1.
+    """
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    
+    class StubHandler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+            time.sleep(latency)
+            if random.random() < failure_rate:
+                self.send_response(503)
+                self.send_header('Retry-After', '0.1')
+                self.end_headers()
+                return
+            answer = json.dumps(STUB_INSIGHTS if body.get('max_tokens') == 500 else STUB_ANALYSIS)
+            self.send_response(200)
+            if body.get('stream'):
+                # Server-sent events with small content deltas, like the real API
+                self.send_header('Content-Type', 'text/event-stream')
+                self.end_headers()
+                for start in range(0, len(answer), 16):
+                    delta = {'choices': [{'delta': {'content': answer[start:start + 16]}}]}
+                    self.wfile.write(f"data: {json.dumps(delta)}\n\n".encode('utf-8'))
+                    self.wfile.flush()
+                    time.sleep(0.01)
+                self.wfile.write(b"data: [DONE]\n\n")
+                return
+            payload = json.dumps({'choices': [{'message': {'role': 'assistant', 'content': answer}}]})
+            self.send_header('Content-Type', 'application/json')
+            self.end_headers()
+            self.wfile.write(payload.encode('utf-8'))
+    
+    logger.info(f"Stub LLM server on http://localhost:{port}/v1")
+    ThreadingHTTPServer(('0.0.0.0', port), StubHandler).serve_forever()
+
 # =============================================================================
 # Usage Example
 # =============================================================================
@@ -508,7 +1974,113 @@ def example_usage():
     for rec in analysis.recommendations:
         print(f"- {rec}")
 
+# =============================================================================
+# Bulk Scoring CLI
+# =============================================================================
+
+def _read_essays(path: str, input_format: str, text_field: str, id_field: str) -> Iterator[tuple]:
+    """Stream (essay_id, text) pairs from a JSONL or CSV file"""
+    with open(path, newline='', encoding='utf-8') as source:
+        if input_format == 'csv':
+            csv.field_size_limit(sys.maxsize)
+            rows = csv.DictReader(source)
+        else:
+            rows = (json.loads(line) for line in source if line.strip())
+        for index, row in enumerate(rows):
+            yield str(row.get(id_field, index)), row.get(text_field) or ''
+
+def grade_corpus(grader: OriginalEssayGrader, essays: Iterable[tuple], output,
+                 output_format: str = 'jsonl', batch_size: int = 256, n_process: int = 1,
+                 include_features: bool = False) -> int:
+    """Score (essay_id, text) pairs and write one row per essay as each batch finishes
+    
+    Essays flow through a single nlp.pipe stream and are graded a batch at a
+    time, so memory stays flat however large the input is.
+    """
+    pending_ids = deque()
+    
+    def texts():
+        for essay_id, text in essays:
+            pending_ids.append(essay_id)
+            yield text
+    
+    feature_stream = grader.extract_features_batch(texts(), batch_size=batch_size, n_process=n_process)
+    writer = None
+    written = 0
+    
+    while True:
+        features = list(itertools.islice(feature_stream, batch_size))
+        if not features:
+            break
+        scores = grader.grade_batch(grader.features_to_matrix(features))
+        
+        for feature, score in zip(features, scores):
+            row = {'id': pending_ids.popleft(), 'score': round(float(score), 2)}
+            if include_features:
+                row.update(feature)
+            if output_format == 'csv':
+                if writer is None:
+                    writer = csv.DictWriter(output, fieldnames=list(row))
+                    writer.writeheader()
+                writer.writerow(row)
+            else:
+                output.write(json.dumps(row) + '\n')
+        
+        output.flush()
+        written += len(features)
+        logger.info(f"Scored {written} essays")
+    
+    return written
+
+def grade_cli(argv: List[str]) -> int:
+    """Re-grade an essay archive: grade essays.jsonl -o scores.csv"""
+    parser = argparse.ArgumentParser(prog='ai-essay-analysis-adaptation.py grade',
+                                     description='Bulk-score essays with the spaCy grader')
+    parser.add_argument('input', help='JSONL or CSV file of essays')
+    parser.add_argument('-o', '--output', default='-', help='Scores file (.jsonl or .csv), default stdout')
+    parser.add_argument('--input-format', choices=['jsonl', 'csv'], help='Default: from the file extension')
+    parser.add_argument('--output-format', choices=['jsonl', 'csv'], help='Default: from the file extension')
+    parser.add_argument('--text-field', default='content')
+    parser.add_argument('--id-field', default='id')
+    parser.add_argument('--batch-size', type=int, default=256)
+    parser.add_argument('--n-process', type=int, default=1, help='spaCy worker processes')
+    parser.add_argument('--features', action='store_true', help='Include the extracted features')
+    args = parser.parse_args(argv)
+    
+    input_format = args.input_format or ('csv' if args.input.endswith('.csv') else 'jsonl')
+    output_format = args.output_format or ('csv' if args.output.endswith('.csv') else 'jsonl')
+    
+    grader = OriginalEssayGrader()
+    essays = _read_essays(args.input, input_format, args.text_field, args.id_field)
+    if args.output == '-':
+        output = sys.stdout
+    else:
+        output = open(args.output, 'w', newline='', encoding='utf-8')
+    try:
+        count = grade_corpus(grader, essays, output, output_format, args.batch_size,
+                             args.n_process, args.features)
+    finally:
+        if output is not sys.stdout:
+            output.close()
+    logger.info(f"Done: {count} essays scored")
+    return 0
+
 if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else None
+    if command == "grade":
+        # Bulk re-grade: python ai-essay-analysis-adaptation.py grade essays.jsonl -o scores.csv
+        sys.exit(grade_cli(sys.argv[2:]))
+    if command == "stub-llm":
+        # Local OpenAI stand-in: python ai-essay-analysis-adaptation.py stub-llm 8089
+        run_stub_llm_server(int(sys.argv[2]) if len(sys.argv) > 2 else 8089)
+        sys.exit(0)
+    if command == "serve-async":
+        # Async endpoint: python ai-essay-analysis-adaptation.py serve-async 5000
+        import uvicorn
+        async_app = create_async_app(analyzer, AsyncChatClient(os.environ.get('OPENAI_API_KEY', '')))
+        uvicorn.run(async_app, host='0.0.0.0', port=int(sys.argv[2]) if len(sys.argv) > 2 else 5000)
+        sys.exit(0)
+    
     # Run example
     example_usage()
     